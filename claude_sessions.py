@@ -0,0 +1,134 @@
+"""
+claude_sessions.py — Remember Claude CLI sessions per issue so later stages resume them.
+
+A task's design, development and review cycles run as separate CLI
+invocations. Resuming the previous session (`--resume`) means Claude
+already has the plan, earlier diffs and feedback in its context, so the
+prompt only needs the comments posted since that session last ran.
+
+Sessions are keyed by issue, persona and working directory: each persona
+resumes its own conversation (under its own system prompt), and the CLI
+stores a session under the directory it ran in and only resumes it from
+there.
+"""
+
+import glob
+import json
+import os
+import logging
+import threading
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = os.environ.get("DATA_DIR", "/data")
+
+
+class SessionStore:
+    """Issue → persona → working dir → CLI session id. Safe to share between workers."""
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR, claude_dir: Optional[str] = None):
+        """
+        Args:
+            data_dir: Where the session index is persisted
+            claude_dir: The CLI's config directory, used to check a session's
+                transcript still exists before resuming it
+        """
+        self.data_file = os.path.join(data_dir, "claude_sessions.json")
+        self.claude_dir = claude_dir or os.environ.get(
+            "CLAUDE_CONFIG_DIR", os.path.expanduser("~/.claude"),
+        )
+        os.makedirs(data_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._load()
+
+    def get(self, issue_number: int, persona: str, cwd: str) -> Optional[dict]:
+        """
+        A persona's resumable session for an issue in a directory.
+
+        Returns:
+            Dict with "session_id", "comment_id" (newest comment the session
+            has seen), "persona" and "updated_at", or None
+        """
+        with self._lock:
+            entry = self.data.get(str(issue_number), {}).get(persona, {}).get(cwd)
+            entry = dict(entry) if entry else None
+        if not entry:
+            return None
+        if not self._transcript_exists(entry["session_id"]):
+            logger.info(
+                f"Claude session {entry['session_id']} for #{issue_number} is gone; "
+                f"starting a new one"
+            )
+            self.forget(issue_number, persona, cwd)
+            return None
+        return entry
+
+    def record(
+        self, issue_number: int, persona: str, cwd: str, session_id: str,
+        comment_id: Optional[int],
+    ):
+        """Remember the session a stage ran in and the newest comment it was given."""
+        with self._lock:
+            sessions = self.data.setdefault(str(issue_number), {}).setdefault(persona, {})
+            previous = sessions.get(cwd, {})
+            if comment_id is None:
+                comment_id = previous.get("comment_id")
+            sessions[cwd] = {
+                "session_id": session_id,
+                "comment_id": comment_id,
+                "persona": persona,
+                "updated_at": datetime.utcnow().isoformat(),
+            }
+            self._save()
+
+    def forget(
+        self, issue_number: int, persona: Optional[str] = None, cwd: Optional[str] = None,
+    ):
+        """
+        Drop one persona's session of an issue in a directory, or all of
+        them if no persona and cwd are given.
+        """
+        with self._lock:
+            key = str(issue_number)
+            if persona is None:
+                removed = self.data.pop(key, None) is not None
+            else:
+                sessions = self.data.get(key, {})
+                removed = sessions.get(persona, {}).pop(cwd, None) is not None
+                if persona in sessions and not sessions[persona]:
+                    del sessions[persona]
+                if key in self.data and not self.data[key]:
+                    del self.data[key]
+            if removed:
+                self._save()
+
+    # ─── Internal ───────────────────────────────────────────────────────
+
+    def _transcript_exists(self, session_id: str) -> bool:
+        """Check the CLI still has the session's transcript (projects/*/<id>.jsonl)."""
+        pattern = os.path.join(self.claude_dir, "projects", "*", f"{session_id}.jsonl")
+        return bool(glob.glob(pattern))
+
+    def _load(self):
+        """Load session index from disk."""
+        if os.path.exists(self.data_file):
+            try:
+                with open(self.data_file, "r") as f:
+                    self.data = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Failed to load Claude session index: {e}")
+                self.data = {}
+        else:
+            self.data = {}
+
+    def _save(self):
+        """Persist session index to disk. Caller must hold the lock."""
+        tmp_file = f"{self.data_file}.tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(tmp_file, self.data_file)
+        except IOError as e:
+            logger.error(f"Failed to save Claude session index: {e}")
@@ -0,0 +1,268 @@
+"""
+claude_stream.py — Run the Claude CLI with stream-json output and follow it live.
+
+`--output-format stream-json` makes the CLI print one JSON event per line
+(init, assistant/user messages, final result) as the session progresses.
+Reading them as they arrive lets us log progress (turns, elapsed time),
+keep only the text we need instead of buffering all output, and stop as
+soon as a persona has written its final verdict.
+"""
+
+import json
+import queue
+import re
+import subprocess
+import threading
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# VERDICT: READY, REVIEW_VERDICT: APPROVED, QA_VERDICT: PASS, ...
+VERDICT_PATTERN = re.compile(r"\b((?:REVIEW_|QA_)?VERDICT:\s*[A-Z_]+)")
+
+# Flags that switch `claude --print` to line-delimited JSON events
+STREAM_FLAGS = ["--output-format", "stream-json", "--verbose"]
+
+
+@dataclass
+class ClaudeRunStats:
+    """Live and final figures for one Claude CLI run."""
+    session_id: Optional[str] = None
+    turns: int = 0
+    max_turns: Optional[int] = None
+    elapsed_seconds: float = 0.0
+    cost_usd: Optional[float] = None
+    verdict: Optional[str] = None
+    result_subtype: Optional[str] = None
+    stopped_early: bool = False
+    timed_out: bool = False
+
+
+class ClaudeStream:
+    """
+    One streaming Claude CLI process.
+
+    Output kept in memory is bounded: only the text written since the last
+    tool call (the equivalent of what `--print` returns) is retained, capped
+    at `max_output_chars`, plus the tail of stderr.
+    """
+
+    def __init__(
+        self,
+        cmd: list[str],
+        cwd: str,
+        timeout_seconds: int,
+        max_turns: Optional[int] = None,
+        stop_on_verdict: bool = False,
+        verdict_grace_seconds: float = 20,
+        max_output_chars: int = 200_000,
+        progress_interval_seconds: float = 60,
+        on_progress: Optional[Callable[[ClaudeRunStats], None]] = None,
+        label: str = "claude",
+        env: Optional[dict] = None,
+    ):
+        """
+        Args:
+            cmd: Full CLI command, including STREAM_FLAGS
+            cwd: Directory to run in
+            timeout_seconds: Kill the process after this long
+            max_turns: Turn limit passed to the CLI (for progress reporting)
+            stop_on_verdict: Stop once a verdict line is final — i.e. no tool
+                call follows it within verdict_grace_seconds
+            verdict_grace_seconds: How long to wait after a verdict for the
+                session to finish on its own before stopping it
+            max_output_chars: Cap on the final text kept in memory
+            progress_interval_seconds: Minimum gap between progress log lines
+            on_progress: Called with the current stats after every turn
+            label: Prefix for log lines (e.g. the persona name)
+            env: Environment for the process
+        """
+        self.cmd = cmd
+        self.cwd = cwd
+        self.timeout_seconds = timeout_seconds
+        self.stop_on_verdict = stop_on_verdict
+        self.verdict_grace_seconds = verdict_grace_seconds
+        self.max_output_chars = max_output_chars
+        self.progress_interval_seconds = progress_interval_seconds
+        self.on_progress = on_progress
+        self.label = label
+        self.env = env
+
+        self.stats = ClaudeRunStats(max_turns=max_turns)
+        self._final_text: list[str] = []
+        self._final_chars = 0
+        self._result_text: Optional[str] = None
+        self._message_ids: set[str] = set()
+        self._verdict_at: Optional[float] = None
+        self._last_progress_log = 0.0
+        self._stderr_tail: deque[str] = deque(maxlen=200)
+
+    def run(self) -> tuple[int, str, str]:
+        """
+        Run the CLI to completion (or until stopped).
+
+        Returns:
+            Tuple of (return code, output text, stderr tail). The return code
+            is 0 when the run was stopped early after a final verdict.
+        """
+        start = time.monotonic()
+        proc = subprocess.Popen(
+            self.cmd,
+            cwd=self.cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            env=self.env,
+        )
+
+        lines: queue.Queue[Optional[str]] = queue.Queue()
+        threading.Thread(
+            target=_pump, args=(proc.stdout, lines.put, True), daemon=True,
+        ).start()
+        stderr_thread = threading.Thread(
+            target=_pump, args=(proc.stderr, self._stderr_tail.append), daemon=True,
+        )
+        stderr_thread.start()
+
+        deadline = start + self.timeout_seconds
+        while True:
+            now = time.monotonic()
+            self.stats.elapsed_seconds = now - start
+
+            if now >= deadline:
+                self.stats.timed_out = True
+                self._stop(proc)
+                break
+
+            wait = min(deadline - now, self.progress_interval_seconds)
+            if self._verdict_at is not None:
+                remaining = self._verdict_at + self.verdict_grace_seconds - now
+                if remaining <= 0:
+                    logger.info(
+                        f"[{self.label}] {self.stats.verdict} is final — "
+                        f"stopping Claude CLI after {self.stats.turns} turn(s)"
+                    )
+                    self.stats.stopped_early = True
+                    self._stop(proc)
+                    break
+                wait = min(wait, remaining)
+
+            try:
+                line = lines.get(timeout=max(wait, 0.05))
+            except queue.Empty:
+                self._log_progress()
+                continue
+            if line is None:
+                break
+            self._handle_line(line)
+
+        returncode = proc.wait()
+        stderr_thread.join(timeout=5)
+        self.stats.elapsed_seconds = time.monotonic() - start
+
+        if self.stats.stopped_early:
+            returncode = 0
+        return returncode, self.output, "".join(self._stderr_tail)
+
+    @property
+    def output(self) -> str:
+        """The session's final text (the `result` event, if one arrived)."""
+        if self._result_text is not None:
+            return self._result_text
+        return "\n\n".join(self._final_text)
+
+    # ─── Internal ───────────────────────────────────────────────────────
+
+    def _handle_line(self, line: str):
+        line = line.strip()
+        if not line:
+            return
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            # Not stream-json (e.g. an older CLI) — treat as plain output
+            self._add_text(line)
+            return
+
+        kind = event.get("type")
+        if event.get("session_id"):
+            self.stats.session_id = event["session_id"]
+
+        if kind == "assistant":
+            self._handle_message(event.get("message") or {})
+        elif kind == "result":
+            self._result_text = event.get("result")
+            self.stats.result_subtype = event.get("subtype")
+            self.stats.turns = event.get("num_turns", self.stats.turns)
+            self.stats.cost_usd = event.get("total_cost_usd", self.stats.cost_usd)
+            # The session is over; no reason to stop it early any more
+            self._verdict_at = None
+
+    def _handle_message(self, message: dict):
+        message_id = message.get("id")
+        if message_id and message_id not in self._message_ids:
+            self._message_ids.add(message_id)
+            self.stats.turns = len(self._message_ids)
+            self._log_progress()
+            if self.on_progress:
+                self.on_progress(self.stats)
+
+        for block in message.get("content") or []:
+            if block.get("type") == "text":
+                text = block.get("text", "")
+                self._add_text(text)
+                match = VERDICT_PATTERN.search(text)
+                if match and self.stop_on_verdict:
+                    self.stats.verdict = match.group(1)
+                    self._verdict_at = time.monotonic()
+            elif block.get("type") == "tool_use":
+                # Still working: earlier text wasn't the final answer
+                self._final_text = []
+                self._final_chars = 0
+                self._verdict_at = None
+
+    def _add_text(self, text: str):
+        self._final_text.append(text)
+        self._final_chars += len(text)
+        while self._final_chars > self.max_output_chars and len(self._final_text) > 1:
+            self._final_chars -= len(self._final_text.pop(0))
+        if self._final_chars > self.max_output_chars:
+            self._final_text[0] = self._final_text[0][-self.max_output_chars:]
+            self._final_chars = len(self._final_text[0])
+
+    def _log_progress(self):
+        """Log turns used and elapsed time, at most once per interval."""
+        now = time.monotonic()
+        if now - self._last_progress_log < self.progress_interval_seconds:
+            return
+        self._last_progress_log = now
+        turns = str(self.stats.turns)
+        if self.stats.max_turns:
+            turns += f"/{self.stats.max_turns}"
+        logger.info(
+            f"[{self.label}] Claude CLI running: turn {turns}, "
+            f"{self.stats.elapsed_seconds:.0f}s elapsed"
+        )
+
+    @staticmethod
+    def _stop(proc: subprocess.Popen):
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _pump(stream, sink: Callable, signal_eof: bool = False):
+    """Copy lines from a pipe into `sink`, optionally ending with None."""
+    try:
+        for line in stream:
+            sink(line)
+    finally:
+        if signal_eof:
+            sink(None)
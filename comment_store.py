@@ -0,0 +1,132 @@
+"""
+comment_store.py — Incremental per-issue comment cache shared by all personas.
+
+The first read of an issue loads its whole thread; later reads only ask
+GitHub for comments updated since the newest one we have (`since=`), and
+comments we post ourselves are added locally without a refetch.
+"""
+
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Thread:
+    """Comments of one issue, keyed by comment id."""
+
+    def __init__(self):
+        self.by_id: dict[int, dict] = {}
+        self.ordered: list[dict] = []
+        self.last_updated: Optional[str] = None
+        self.refreshed_at: float = 0.0
+
+    def merge(self, comments: list[dict], advance: bool = True):
+        for c in comments:
+            self.by_id[c["id"]] = c
+            updated = c.get("updated_at") or c.get("created_at")
+            if advance and updated and (not self.last_updated or updated > self.last_updated):
+                self.last_updated = updated
+        self.ordered = sorted(
+            self.by_id.values(),
+            key=lambda c: (c.get("created_at") or "", c["id"]),
+        )
+
+
+class CommentStore:
+    """
+    Per-issue comment cache that refreshes incrementally.
+
+    Thread-safe; bounded to `max_issues` threads (least recently used
+    are dropped). Deleted comments are not detected until the issue is
+    invalidated or evicted.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[int, Optional[str]], list[dict]],
+        max_issues: int = 200,
+        refresh_after_seconds: float = 30,
+    ):
+        """
+        Args:
+            fetch: Callable(issue_number, since) returning comments updated at
+                or after `since` (all comments when since is None)
+            max_issues: Maximum number of issue threads kept in memory
+            refresh_after_seconds: Serve reads from memory without asking
+                GitHub if the thread was refreshed this recently
+        """
+        self.fetch = fetch
+        self.max_issues = max_issues
+        self.refresh_after_seconds = refresh_after_seconds
+        self._threads: OrderedDict[int, _Thread] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self, issue_number: int, refresh: bool = True, force_refresh: bool = False
+    ) -> list[dict]:
+        """
+        All comments on an issue, oldest first.
+
+        Args:
+            issue_number: The issue number
+            refresh: Pull new comments from GitHub if the local copy is stale
+            force_refresh: Pull new comments even if the local copy is fresh
+        """
+        with self._lock:
+            thread = self._threads.get(issue_number)
+            if thread is not None:
+                self._threads.move_to_end(issue_number)
+                fresh = time.time() - thread.refreshed_at < self.refresh_after_seconds
+                if not force_refresh and (fresh or not refresh):
+                    return list(thread.ordered)
+            since = thread.last_updated if thread else None
+
+        comments = self.fetch(issue_number, since)
+
+        with self._lock:
+            thread = self._threads.get(issue_number)
+            if thread is None:
+                thread = _Thread()
+                self._threads[issue_number] = thread
+                while len(self._threads) > self.max_issues:
+                    self._threads.popitem(last=False)
+            thread.merge(comments or [])
+            thread.refreshed_at = time.time()
+            self._threads.move_to_end(issue_number)
+            if since:
+                logger.debug(
+                    f"Comment store: #{issue_number} +{len(comments or [])} "
+                    f"comment(s) since {since}"
+                )
+            return list(thread.ordered)
+
+    def is_loaded(self, issue_number: int) -> bool:
+        """Check whether an issue's thread is already held locally."""
+        with self._lock:
+            return issue_number in self._threads
+
+    def add_local(self, issue_number: int, comment: dict):
+        """
+        Record a comment we just posted, without refetching.
+
+        Doesn't advance the `since` watermark, so comments others posted
+        just before ours are still picked up by the next refresh.
+        """
+        if not comment or "id" not in comment:
+            return
+        with self._lock:
+            thread = self._threads.get(issue_number)
+            if thread is not None:
+                thread.merge([comment], advance=False)
+
+    def invalidate(self, issue_number: Optional[int] = None):
+        """Forget one issue's thread, or every thread if no issue is given."""
+        with self._lock:
+            if issue_number is None:
+                self._threads.clear()
+            else:
+                self._threads.pop(issue_number, None)
@@ -0,0 +1,331 @@
+"""
+context_budget.py — Pack prompt context into a token budget by relevance.
+
+Prompt builders add their context as sections (acceptance criteria, issue
+comments, diff files, ...) with a priority. `render()` keeps the highest
+priority sections that fit the budget — truncating the last one that only
+partly fits — and emits them in the order they were added, with a note of
+what was left out. Prompt size stays predictable, and the latest review
+feedback is never the thing that gets cut.
+"""
+
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio for English text and code
+CHARS_PER_TOKEN = 4
+
+# Priorities (higher is kept first)
+REQUIRED = 1000
+HIGH = 80
+NORMAL = 50
+LOW = 20
+
+# Don't bother keeping a truncated section smaller than this
+MIN_TRUNCATED_TOKENS = 150
+
+# Markers in persona comments (see GitHubClient.post_persona_comment)
+REVIEW_MARKERS = ("**Code Review:", "**Review Notes:**", "**QA:", "**QA Notes:**")
+PLAN_MARKERS = ("**Implementation Plan**", "**Requirements Approved**")
+
+# Files whose diffs are rarely worth reading
+LOW_VALUE_FILES = re.compile(
+    r"(^|/)(package-lock\.json|yarn\.lock|pnpm-lock\.yaml|poetry\.lock|Cargo\.lock|"
+    r"go\.sum|composer\.lock|Gemfile\.lock)$|\.min\.(js|css)$|\.snap$|(^|/)(vendor|dist)/"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate — good enough for budgeting, no tokenizer needed."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class _Section:
+    heading: str
+    separator: str = "\n\n"
+    fence: Optional[str] = None
+    items: list["_Item"] = field(default_factory=list)
+
+
+@dataclass
+class _Item:
+    text: str
+    priority: float
+    label: str
+    order: int
+    truncatable: bool = True
+    key: Optional[int] = None
+
+
+class ContextAssembler:
+    """Collects prompt sections and packs them into a token budget."""
+
+    def __init__(self, budget_tokens: int):
+        """
+        Args:
+            budget_tokens: Total tokens the packed sections may use
+        """
+        self.budget_tokens = budget_tokens
+        self._sections: list[_Section] = []
+        self._order = 0
+        # Ids of the comments the last render() kept in full
+        self.rendered_comment_ids: set[int] = set()
+
+    def add(
+        self, heading: str, text: str, priority: float = NORMAL,
+        fence: Optional[str] = None, truncatable: bool = True,
+    ):
+        """Add a single-block section (skipped if empty)."""
+        if not text or not text.strip():
+            return
+        section = self._section(heading, fence=fence)
+        self._add_item(section, text, priority, heading.lstrip("# "), truncatable)
+
+    def add_comments(
+        self, heading: str, comments: list[dict], human_username: str = "",
+        preamble: str = "",
+    ):
+        """
+        Add issue comments as one section, scored individually.
+
+        The newest review feedback ranks highest, then the human's comments
+        and design plans, then everything else; newer beats older within
+        each kind.
+        """
+        if not comments:
+            return
+        section = self._section(heading, separator="\n\n---\n\n")
+        if preamble:
+            self._add_item(section, preamble, REQUIRED, "note", truncatable=False)
+
+        newest_review = None
+        for c in comments:
+            if any(m in c.get("body", "") for m in REVIEW_MARKERS):
+                newest_review = c.get("id")
+
+        count = len(comments)
+        for i, c in enumerate(comments):
+            author = c.get("user", {}).get("login", "unknown")
+            body = c.get("body", "")
+            if c.get("id") == newest_review:
+                priority = REQUIRED - 1
+            elif human_username and author == human_username:
+                priority = HIGH + 5
+            elif any(m in body for m in PLAN_MARKERS):
+                priority = HIGH
+            elif any(m in body for m in REVIEW_MARKERS):
+                priority = NORMAL + 10
+            else:
+                priority = NORMAL
+            # Recency: up to +10 for the newest comment
+            priority += 10 * (i + 1) / count
+            self._add_item(
+                section, f"**{author}:**\n{body}", priority, f"comment by {author}",
+                key=c.get("id"),
+            )
+
+    def add_diff(self, heading: str, diff: str, priority: float = HIGH):
+        """
+        Add a unified diff, one item per file. Lockfiles, minified and
+        vendored files rank lowest; otherwise smaller files are kept first
+        so one huge file doesn't crowd out the rest.
+        """
+        files = split_diff(diff)
+        if not files:
+            return
+        section = self._section(heading, separator="\n", fence="diff")
+        largest = max(len(text) for _, text in files) or 1
+        for path, text in files:
+            file_priority = LOW if LOW_VALUE_FILES.search(path) else priority
+            file_priority += 5 * (1 - len(text) / largest)
+            self._add_item(section, text, file_priority, f"`{path}`")
+
+    def render(self) -> list[str]:
+        """
+        Pack sections into the budget.
+
+        Returns:
+            Prompt parts ("\\n## Heading\\nbody"), in the order sections were added
+        """
+        items = [(s, it) for s in self._sections for it in s.items]
+        ranked = sorted(items, key=lambda si: (-si[1].priority, si[1].order))
+
+        remaining = self.budget_tokens
+        kept: dict[int, str] = {}
+        opened: set[int] = set()
+        self.rendered_comment_ids = set()
+        for section, item in ranked:
+            overhead = 0 if id(section) in opened else estimate_tokens(section.heading) + 4
+            cost = estimate_tokens(item.text) + overhead
+            if cost <= remaining:
+                kept[item.order] = item.text
+                if item.key is not None:
+                    self.rendered_comment_ids.add(item.key)
+            elif item.truncatable and remaining - overhead >= MIN_TRUNCATED_TOKENS:
+                chars = (remaining - overhead - 10) * CHARS_PER_TOKEN
+                kept[item.order] = item.text[:chars] + "\n... (truncated)"
+                cost = remaining
+            else:
+                continue
+            remaining -= cost
+            opened.add(id(section))
+
+        parts = []
+        dropped_total = 0
+        for section in self._sections:
+            included = [kept[it.order] for it in section.items if it.order in kept]
+            dropped = [it.label for it in section.items if it.order not in kept]
+            dropped_total += len(dropped)
+            if not included:
+                if dropped:
+                    parts.append(
+                        f"\n{section.heading}\n_(omitted to fit the context budget)_"
+                    )
+                continue
+            body = section.separator.join(included)
+            if section.fence is not None:
+                body = f"```{section.fence}\n{body}\n```"
+            if dropped:
+                body += f"\n\n_({len(dropped)} omitted for length: {_summarise(dropped)})_"
+            parts.append(f"\n{section.heading}\n{body}")
+
+        if dropped_total:
+            logger.debug(
+                f"Context budget {self.budget_tokens} tokens: dropped {dropped_total} item(s)"
+            )
+        return parts
+
+    # ─── Internal ───────────────────────────────────────────────────────
+
+    def _section(
+        self, heading: str, separator: str = "\n\n", fence: Optional[str] = None,
+    ) -> _Section:
+        section = _Section(heading=heading, separator=separator, fence=fence)
+        self._sections.append(section)
+        return section
+
+    def _add_item(
+        self, section: _Section, text: str, priority: float, label: str,
+        truncatable: bool = True, key: Optional[int] = None,
+    ):
+        section.items.append(_Item(text, priority, label, self._order, truncatable, key))
+        self._order += 1
+
+
+def split_diff(diff: str) -> list[tuple[str, str]]:
+    """Split a unified git diff into (path, text) per file."""
+    if not diff:
+        return []
+    chunks = re.split(r"(?m)^(?=diff --git )", diff)
+    files = []
+    for chunk in chunks:
+        if not chunk.strip():
+            continue
+        match = re.match(r"diff --git a/(\S+) b/(\S+)", chunk)
+        path = match.group(2) if match else "(diff)"
+        files.append((path, chunk.rstrip("\n")))
+    return files
+
+
+def chunk_diff(
+    files: list[tuple[str, str]], max_tokens: int
+) -> list[list[tuple[str, str]]]:
+    """
+    Group per-file diffs into chunks of at most ~max_tokens, keeping files
+    whole where possible. A file too big for one chunk is split between
+    hunks (labelled "path (part k/n)").
+
+    Args:
+        files: (path, diff text) pairs, e.g. from split_diff
+        max_tokens: Target size of each chunk
+
+    Returns:
+        List of chunks, each a list of (label, diff text)
+    """
+    pieces = []
+    for path, text in files:
+        if estimate_tokens(text) <= max_tokens:
+            pieces.append((path, text))
+            continue
+        parts = _split_hunks(text, max_tokens)
+        for i, part in enumerate(parts, 1):
+            pieces.append((f"{path} (part {i}/{len(parts)})", part))
+
+    chunks: list[list[tuple[str, str]]] = []
+    size = 0
+    for label, text in pieces:
+        tokens = estimate_tokens(text)
+        if not chunks or size + tokens > max_tokens:
+            chunks.append([])
+            size = 0
+        chunks[-1].append((label, text))
+        size += tokens
+    return chunks
+
+
+def _split_hunks(text: str, max_tokens: int) -> list[str]:
+    """
+    Split one file's diff at @@ hunk boundaries into parts of ~max_tokens,
+    each repeating the file header. A hunk bigger than a part (e.g. a whole
+    new file) is split further at line boundaries, so nothing is dropped.
+    """
+    header, *hunks = re.split(r"(?m)^(?=@@ )", text)
+    if not hunks:
+        return _split_lines(text, max_tokens)
+
+    budget = max(1, max_tokens - estimate_tokens(header))
+    pieces: list[str] = []
+    for hunk in hunks:
+        if estimate_tokens(hunk) > budget:
+            pieces.extend(_split_lines(hunk, budget))
+        else:
+            pieces.append(hunk)
+
+    parts: list[str] = []
+    current = ""
+    for piece in pieces:
+        if current and estimate_tokens(current + piece) > budget:
+            parts.append(header + current)
+            current = ""
+        current += piece
+    if current:
+        parts.append(header + current)
+    return parts
+
+
+def _split_lines(text: str, max_tokens: int) -> list[str]:
+    """Split text at line boundaries into parts of ~max_tokens (long lines are cut)."""
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    parts: list[str] = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and len(current) + len(line) > max_chars:
+            parts.append(current)
+            current = ""
+        current += line
+    if current or not parts:
+        parts.append(current)
+    return parts
+
+
+def _summarise(labels: list[str], limit: int = 8) -> str:
+    """Comma-separated labels, collapsing repeats ("comment by bot ×3")."""
+    counts: dict[str, int] = {}
+    for label in labels:
+        counts[label] = counts.get(label, 0) + 1
+    shown = [f"{label} ×{n}" if n > 1 else label for label, n in counts.items()]
+    text = ", ".join(shown[:limit])
+    if len(shown) > limit:
+        text += f", and {len(shown) - limit} more"
+    return text
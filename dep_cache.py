@@ -0,0 +1,259 @@
+"""
+dep_cache.py — Share installed dependencies between worktrees by lockfile hash.
+
+A fresh worktree has no node_modules or cargo target/, so the first test
+run of every stage reinstalls everything. When a worktree is removed its
+dependency directories are saved here, keyed by a hash of the lockfile(s)
+that produced them; a new worktree with the same lockfile gets them back
+as a copy-on-write clone (reflink), which costs almost no time or disk,
+or else as a copy.
+
+Hard links are only used when configured explicitly: npm, node-gyp and
+patch-package rewrite files under node_modules in place (cargo does the
+same under target/), which through a shared inode would change the cache
+entry and every other worktree linked to it.
+
+Go needs no entry: its module and build caches are already shared by the
+toolchain (GOMODCACHE, GOCACHE), not stored per worktree.
+
+Python virtualenvs aren't cached: they aren't relocatable (activate
+scripts, console-script shebangs and editable installs hold the original
+worktree's absolute path), and QA runs pytest with the system interpreter.
+"""
+
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+WORK_DIR = os.environ.get("WORK_DIR", "/work")
+# Under WORK_DIR so hard links and reflinks to worktrees stay on one filesystem
+DEPS_DIR = os.path.join(WORK_DIR, "deps")
+
+ENTRY_META = "entry.json"
+
+
+@dataclass(frozen=True)
+class Ecosystem:
+    """A dependency directory and the lockfiles that determine its contents."""
+    name: str
+    lockfiles: tuple[str, ...]
+    directory: str
+    # Safe to hard-link: the tools replace files rather than rewrite them in place
+    hardlink_safe: bool = True
+
+
+ECOSYSTEMS = (
+    # npm rewrites node_modules/.package-lock.json in place, as do node-gyp
+    # rebuilds and patch-package
+    Ecosystem("npm", ("package-lock.json",), "node_modules", hardlink_safe=False),
+    Ecosystem("yarn", ("yarn.lock",), "node_modules", hardlink_safe=False),
+    # cargo rewrites fingerprints and artifacts in place
+    Ecosystem("cargo", ("Cargo.lock",), "target", hardlink_safe=False),
+)
+
+
+class DependencyCache:
+    """Content-addressed store of dependency directories, evicted LRU under a disk budget."""
+
+    def __init__(
+        self, cache_dir: str = DEPS_DIR, max_bytes: Optional[int] = None,
+        link: str = "auto",
+    ):
+        """
+        Args:
+            cache_dir: Where entries are stored (same filesystem as worktrees)
+            max_bytes: Evict least recently used entries beyond this size
+            link: How entries are placed in worktrees — "auto" (reflink, then
+                hard links where safe, then copy), "reflink", "copy", or
+                "hardlink" (hard links for every ecosystem; opt-in, since an
+                in-place write then changes the cache entry and other worktrees)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.link = link
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def restore(self, worktree_path: str) -> list[str]:
+        """
+        Place cached dependency directories into a worktree.
+
+        Only directories the worktree doesn't have yet are restored.
+
+        Returns:
+            Names of the directories restored
+        """
+        restored = []
+        for eco, key in self._keys(worktree_path):
+            target = os.path.join(worktree_path, eco.directory)
+            if eco.directory in restored or os.path.lexists(target):
+                continue
+            entry = self._entry_dir(eco, key)
+            source = os.path.join(entry, eco.directory)
+            if not os.path.isdir(source):
+                continue
+            start = time.monotonic()
+            if not self._place(source, target, eco):
+                continue
+            self._touch(entry)
+            restored.append(eco.directory)
+            logger.info(
+                f"Restored cached {eco.directory} ({eco.name} {key[:12]}) into "
+                f"{worktree_path} in {time.monotonic() - start:.1f}s"
+            )
+        return restored
+
+    def save(self, worktree_path: str, skip: tuple[str, ...] = ()) -> list[str]:
+        """
+        Store a worktree's dependency directories that aren't cached yet.
+
+        Args:
+            worktree_path: Worktree about to be removed (or otherwise settled)
+            skip: Directory names not to store (e.g. ones tracked in git)
+
+        Returns:
+            Names of the directories stored
+        """
+        saved = []
+        for eco, key in self._keys(worktree_path):
+            source = os.path.join(worktree_path, eco.directory)
+            if eco.directory in skip or eco.directory in saved:
+                continue
+            if not os.path.isdir(source) or os.path.islink(source):
+                continue
+            entry = self._entry_dir(eco, key)
+            if os.path.exists(entry):
+                continue
+
+            tmp_entry = f"{entry}.tmp.{os.getpid()}.{threading.get_ident()}"
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            os.makedirs(tmp_entry)
+            if not self._place(source, os.path.join(tmp_entry, eco.directory), eco):
+                shutil.rmtree(tmp_entry, ignore_errors=True)
+                continue
+            size = _dir_size(tmp_entry)
+            with open(os.path.join(tmp_entry, ENTRY_META), "w") as f:
+                json.dump({"ecosystem": eco.name, "key": key, "size": size}, f)
+            try:
+                os.rename(tmp_entry, entry)
+            except OSError:
+                # Another worktree with the same lockfile got there first
+                shutil.rmtree(tmp_entry, ignore_errors=True)
+                continue
+            saved.append(eco.directory)
+            logger.info(
+                f"Cached {eco.directory} ({eco.name} {key[:12]}, "
+                f"{size // (1024 * 1024)} MB) from {worktree_path}"
+            )
+        if saved:
+            self.evict()
+        return saved
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes."""
+        if not self.max_bytes:
+            return
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                meta_path = os.path.join(self.cache_dir, name, ENTRY_META)
+                try:
+                    with open(meta_path, "r") as f:
+                        size = json.load(f).get("size", 0)
+                    last_used = os.path.getmtime(meta_path)
+                except (OSError, json.JSONDecodeError):
+                    continue  # in progress, or not an entry
+                entries.append((last_used, name, size))
+            entries.sort()  # oldest first
+
+            total = sum(size for _, _, size in entries)
+            for _, name, size in entries:
+                if total <= self.max_bytes:
+                    break
+                # Worktrees hold their own links/clones, so this never breaks one
+                logger.info(f"Evicting cached dependencies {name} ({size // (1024 * 1024)} MB)")
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+                total -= size
+
+    # ─── Internal ───────────────────────────────────────────────────────
+
+    def _keys(self, worktree_path: str) -> list[tuple[Ecosystem, str]]:
+        """(ecosystem, key) for each ecosystem whose lockfiles the worktree has."""
+        keys = []
+        for eco in ECOSYSTEMS:
+            digest = hashlib.sha256()
+            found = False
+            for lockfile in eco.lockfiles:
+                path = os.path.join(worktree_path, lockfile)
+                if not os.path.isfile(path):
+                    continue
+                found = True
+                digest.update(lockfile.encode())
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+            if not found:
+                continue
+            # Installed packages may contain native builds for this platform
+            digest.update(f"{platform.system()}-{platform.machine()}".encode())
+            keys.append((eco, digest.hexdigest()))
+        return keys
+
+    def _entry_dir(self, eco: Ecosystem, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{eco.name}-{key[:32]}")
+
+    def _place(self, source: str, target: str, eco: Ecosystem) -> bool:
+        """Clone `source` to `target` using the cheapest method available."""
+        methods = {
+            "auto": ["reflink", "hardlink", "copy"],
+            "reflink": ["reflink", "copy"],
+            "hardlink": ["hardlink", "copy"],
+            "copy": ["copy"],
+        }.get(self.link, ["copy"])
+        for method in methods:
+            if method == "hardlink" and not eco.hardlink_safe and self.link != "hardlink":
+                continue
+            if method == "copy":
+                try:
+                    shutil.copytree(source, target, symlinks=True)
+                    return True
+                except (OSError, shutil.Error) as e:
+                    logger.warning(f"Failed to copy {source} to {target}: {e}")
+                    shutil.rmtree(target, ignore_errors=True)
+                    return False
+            flag = "--reflink=always" if method == "reflink" else "--link"
+            result = subprocess.run(
+                ["cp", "-a", flag, source, target], capture_output=True, text=True,
+            )
+            if result.returncode == 0:
+                return True
+            shutil.rmtree(target, ignore_errors=True)
+        return False
+
+    @staticmethod
+    def _touch(entry: str):
+        try:
+            os.utime(os.path.join(entry, ENTRY_META), None)
+        except OSError:
+            pass
+
+
+def _dir_size(path: str) -> int:
+    """Total size in bytes of the files under a directory."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
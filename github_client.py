@@ -3,28 +3,73 @@ github_client.py — All GitHub API interactions: issues, labels, comments, PRs,
 """
 
 import os
+import time
 import logging
+import threading
 import requests
-from typing import Optional
+from typing import Iterator, Optional
+
+from response_cache import ResponseCache
+from comment_store import CommentStore
+from rate_limiter import (
+    RateLimiter, IDEMPOTENT_METHODS, RETRYABLE_STATUSES,
+    backoff_delay, retry_after_seconds,
+)
 
 logger = logging.getLogger(__name__)
 
 GITHUB_API = "https://api.github.com"
 
+# Labels that mark a stage — an issue carries exactly one of these
+STAGE_LABELS = {
+    "ready", "triage", "design", "development",
+    "code-review", "qa", "awaiting-human", "done", "failed",
+}
+
 
 class GitHubClient:
     """Handles all interactions with the GitHub API."""
 
-    def __init__(self, token: str, task_repo: str, human_username: str):
+    def __init__(
+        self, token: str, task_repo: str, human_username: str,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        comment_refresh_seconds: float = 30,
+    ):
         """
         Args:
             token: GitHub Personal Access Token
             task_repo: The task queue repo (e.g. "user/Claude-ToDo")
             human_username: GitHub username for @Human tagging
+            cache: Optional conditional-request cache for GET responses
+            rate_limiter: Shared API budget tracker (a default one is created if omitted)
+            max_retries: Retries for rate-limited or transiently failing requests
+            backoff_base: Base delay in seconds for exponential backoff
+            backoff_max: Maximum backoff delay in seconds
+            comment_refresh_seconds: How long a loaded comment thread is
+                served from memory before asking GitHub for new comments
         """
         self.token = token
         self.task_repo = task_repo
         self.human_username = human_username
+        self.cache = cache
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # In-process view of each issue's labels, so stage transitions
+        # don't need to GET the issue first
+        self._labels: dict[int, list[str]] = {}
+        self._labels_lock = threading.Lock()
+
+        # Shared comment threads, refreshed incrementally with since=
+        self.comments = CommentStore(
+            self._fetch_comments, refresh_after_seconds=comment_refresh_seconds,
+        )
         self.session = requests.Session()
         self.session.headers.update({
             "Authorization": f"token {token}",
@@ -34,50 +79,29 @@ class GitHubClient:
 
     # ─── Issue Fetching ─────────────────────────────────────────────────
 
-    def get_ready_issues(self) -> list[dict]:
-        """Fetch all open issues with both 'claude' and 'ready' labels, oldest first."""
-        url = f"{GITHUB_API}/repos/{self.task_repo}/issues"
-        params = {
-            "labels": "claude,ready",
-            "state": "open",
-            "sort": "created",
-            "direction": "asc",
-            "per_page": 50,
-        }
-        resp = self._request("GET", url, params=params)
-        if resp is None:
-            return []
-        return [i for i in resp if "pull_request" not in i]
+    def get_open_task_issues(self) -> list[dict]:
+        """Fetch all open issues with the 'claude' label, whatever their stage, oldest first."""
+        return list(self._iter_labelled_issues("claude"))
 
     def get_awaiting_human_issues(self) -> list[dict]:
         """Fetch all open issues with both 'claude' and 'awaiting-human' labels, oldest first."""
-        url = f"{GITHUB_API}/repos/{self.task_repo}/issues"
-        params = {
-            "labels": "claude,awaiting-human",
-            "state": "open",
-            "sort": "created",
-            "direction": "asc",
-            "per_page": 50,
-        }
-        resp = self._request("GET", url, params=params)
-        if resp is None:
-            return []
-        return [i for i in resp if "pull_request" not in i]
+        return list(self.iter_awaiting_human_issues())
+
+    def iter_awaiting_human_issues(self, since: Optional[str] = None) -> Iterator[dict]:
+        """
+        Lazily page through open 'claude' + 'awaiting-human' issues, oldest first.
+
+        Args:
+            since: Only issues updated at or after this ISO 8601 timestamp
+        """
+        return self._iter_labelled_issues("claude,awaiting-human", since=since)
 
     def get_in_progress_issues(self) -> list[dict]:
         """Fetch issues currently being worked on (any active stage label)."""
         stages = ["triage", "design", "development", "code-review", "qa"]
         all_issues = []
         for stage in stages:
-            url = f"{GITHUB_API}/repos/{self.task_repo}/issues"
-            params = {
-                "labels": f"claude,{stage}",
-                "state": "open",
-                "per_page": 50,
-            }
-            resp = self._request("GET", url, params=params)
-            if resp:
-                all_issues.extend([i for i in resp if "pull_request" not in i])
+            all_issues.extend(self._iter_labelled_issues(f"claude,{stage}", sort=None))
         # Deduplicate by issue number
         seen = set()
         unique = []
@@ -87,43 +111,103 @@ class GitHubClient:
                 unique.append(issue)
         return unique
 
+    def _iter_labelled_issues(
+        self, labels: str, sort: Optional[str] = "created",
+        since: Optional[str] = None,
+    ) -> Iterator[dict]:
+        """Page through open issues carrying all of `labels`, skipping PRs."""
+        url = f"{GITHUB_API}/repos/{self.task_repo}/issues"
+        params = {"labels": labels, "state": "open", "per_page": 100}
+        if sort:
+            params.update({"sort": sort, "direction": "asc"})
+        if since:
+            params["since"] = since
+        for issue in self._paginate(url, params):
+            if "pull_request" not in issue:
+                self._remember_labels(issue["number"], issue.get("labels", []))
+                yield issue
+
     def get_issue(self, issue_number: int) -> Optional[dict]:
         """Fetch a single issue by number."""
         url = f"{GITHUB_API}/repos/{self.task_repo}/issues/{issue_number}"
-        return self._request("GET", url)
+        issue = self._request("GET", url)
+        if issue:
+            self._remember_labels(issue_number, issue.get("labels", []))
+        return issue
 
     def get_issue_comments(self, issue_number: int) -> list[dict]:
-        """Fetch all comments on an issue."""
+        """
+        Fetch all comments on an issue.
+
+        Served from the shared comment store: the first call loads the
+        thread, later calls only pull comments added since.
+        """
+        return self.comments.get(issue_number)
+
+    def iter_issue_comments(
+        self, issue_number: int, newest_first: bool = False
+    ) -> Iterator[dict]:
+        """
+        Lazily page through the comments on an issue.
+
+        Args:
+            issue_number: The issue number
+            newest_first: Start from the last page and walk backwards, so
+                callers looking for recent comments can stop after one page
+        """
+        url = f"{GITHUB_API}/repos/{self.task_repo}/issues/{issue_number}/comments"
+        return self._paginate(url, {"per_page": 100}, reverse=newest_first)
+
+    def get_latest_comment(self, issue_number: int, fresh: bool = False) -> Optional[dict]:
+        """
+        Fetch only the most recent comment on an issue (at most two requests).
+
+        Args:
+            issue_number: The issue number
+            fresh: Bypass the comment store's refresh window
+        """
+        if self.comments.is_loaded(issue_number):
+            comments = self.comments.get(issue_number, force_refresh=fresh)
+            return comments[-1] if comments else None
+        return next(self.iter_issue_comments(issue_number, newest_first=True), None)
+
+    def _fetch_comments(self, issue_number: int, since: Optional[str] = None) -> list[dict]:
+        """Fetch comments updated at or after `since` (all comments if None)."""
         url = f"{GITHUB_API}/repos/{self.task_repo}/issues/{issue_number}/comments"
         params = {"per_page": 100}
-        resp = self._request("GET", url, params=params)
-        return resp if resp else []
+        if since:
+            params["since"] = since
+        return list(self._paginate(url, params))
 
     # ─── Labels ─────────────────────────────────────────────────────────
 
-    def set_stage_label(self, issue_number: int, new_stage: str):
+    def set_stage_label(
+        self, issue_number: int, new_stage: str,
+        current_labels: Optional[list[str]] = None,
+    ):
         """
         Remove all stage labels and set the new one.
         Keeps non-stage labels (claude, night-only, recurring, etc.) intact.
+
+        The new label set is computed locally and applied with a single
+        PUT. The current labels come from `current_labels`, else from the
+        in-process view (refreshed every time an issue is fetched), and
+        only as a last resort from a GET of the issue.
         """
-        stage_labels = {
-            "ready", "triage", "design", "development",
-            "code-review", "qa", "awaiting-human", "done", "failed",
-        }
-        issue = self.get_issue(issue_number)
-        if not issue:
+        labels = current_labels
+        if labels is None:
+            labels = self.known_labels(issue_number)
+        if labels is None:
+            issue = self.get_issue(issue_number)
+            if not issue:
+                return
+            labels = [l["name"] for l in issue.get("labels", [])]
+
+        new_labels = [l for l in labels if l not in STAGE_LABELS] + [new_stage]
+        if set(new_labels) == set(labels):
             return
 
-        current_labels = [l["name"] for l in issue.get("labels", [])]
-
-        # Remove old stage labels
-        for label in current_labels:
-            if label in stage_labels and label != new_stage:
-                self._remove_label(issue_number, label)
-
-        # Add new stage label
-        if new_stage not in current_labels:
-            self._add_label(issue_number, new_stage)
+        self._replace_labels(issue_number, new_labels)
 
     def add_label(self, issue_number: int, label: str):
         """Add a single label to an issue."""
@@ -133,15 +217,46 @@ class GitHubClient:
         """Remove a single label from an issue."""
         self._remove_label(issue_number, label)
 
+    def note_issue(self, issue: dict):
+        """Record issue state seen elsewhere (e.g. in a webhook payload)."""
+        self._remember_labels(issue["number"], issue.get("labels", []))
+
+    def known_labels(self, issue_number: int) -> Optional[list[str]]:
+        """Labels of an issue as last seen by this process, or None if unknown."""
+        with self._labels_lock:
+            labels = self._labels.get(issue_number)
+            return list(labels) if labels is not None else None
+
+    def _remember_labels(self, issue_number: int, labels: list):
+        """Record an issue's labels (names or label dicts) in the local view."""
+        names = [l["name"] if isinstance(l, dict) else l for l in labels]
+        with self._labels_lock:
+            self._labels[issue_number] = names
+
+    def _replace_labels(self, issue_number: int, labels: list[str]):
+        """Set an issue's full label list in one request."""
+        url = f"{GITHUB_API}/repos/{self.task_repo}/issues/{issue_number}/labels"
+        resp = self._request("PUT", url, json={"labels": labels})
+        if isinstance(resp, list):
+            self._remember_labels(issue_number, resp)
+        else:
+            # Unknown outcome — force a refetch next time
+            with self._labels_lock:
+                self._labels.pop(issue_number, None)
+
     def _add_label(self, issue_number: int, label: str):
         """Add a label, creating it if it doesn't exist."""
         url = f"{GITHUB_API}/repos/{self.task_repo}/issues/{issue_number}/labels"
-        self._request("POST", url, json={"labels": [label]})
+        resp = self._request("POST", url, json={"labels": [label]})
+        if isinstance(resp, list):
+            self._remember_labels(issue_number, resp)
 
     def _remove_label(self, issue_number: int, label: str):
         """Remove a label from an issue."""
         url = f"{GITHUB_API}/repos/{self.task_repo}/issues/{issue_number}/labels/{label}"
-        self._request("DELETE", url)
+        resp = self._request("DELETE", url)
+        if isinstance(resp, list):
+            self._remember_labels(issue_number, resp)
 
     def ensure_labels_exist(self):
         """Create all required labels in the task repo if they don't exist."""
@@ -161,8 +276,9 @@ class GitHubClient:
         }
 
         url = f"{GITHUB_API}/repos/{self.task_repo}/labels"
-        existing = self._request("GET", url, params={"per_page": 100})
-        existing_names = {l["name"] for l in (existing or [])}
+        existing_names = {
+            l["name"] for l in self._paginate(url, {"per_page": 100})
+        }
 
         for name, color in required.items():
             if name not in existing_names:
@@ -174,10 +290,13 @@ class GitHubClient:
 
     # ─── Comments ───────────────────────────────────────────────────────
 
-    def post_comment(self, issue_number: int, body: str):
-        """Post a comment on an issue."""
+    def post_comment(self, issue_number: int, body: str) -> Optional[dict]:
+        """Post a comment on an issue and record it in the comment store."""
         url = f"{GITHUB_API}/repos/{self.task_repo}/issues/{issue_number}/comments"
-        self._request("POST", url, json={"body": body})
+        comment = self._request("POST", url, json={"body": body})
+        if isinstance(comment, dict):
+            self.comments.add_local(issue_number, comment)
+        return comment
 
     def post_persona_comment(self, issue_number: int, persona: str, body: str):
         """Post a comment prefixed with the persona identifier."""
@@ -245,17 +364,22 @@ class GitHubClient:
         """Fetch the diff for a pull request."""
         url = f"{GITHUB_API}/repos/{repo}/pulls/{pr_number}"
         headers = {"Accept": "application/vnd.github.v3.diff"}
-        resp = self.session.get(url, headers=headers)
-        if resp.status_code == 200:
+        resp = self._send("GET", url, headers=headers)
+        if resp is not None and resp.status_code == 200:
             return resp.text
-        logger.error(f"Failed to get PR diff: {resp.status_code}")
+        logger.error(
+            f"Failed to get PR diff: {resp.status_code if resp is not None else 'no response'}"
+        )
         return None
 
     def get_pr_files(self, repo: str, pr_number: int) -> list[dict]:
         """Fetch the list of files changed in a PR."""
+        return list(self.iter_pr_files(repo, pr_number))
+
+    def iter_pr_files(self, repo: str, pr_number: int) -> Iterator[dict]:
+        """Lazily page through the files changed in a PR."""
         url = f"{GITHUB_API}/repos/{repo}/pulls/{pr_number}/files"
-        resp = self._request("GET", url, params={"per_page": 100})
-        return resp if resp else []
+        return self._paginate(url, {"per_page": 100})
 
     def merge_pull_request(self, repo: str, pr_number: int, merge_method: str = "squash") -> bool:
         """Merge a pull request."""
@@ -272,27 +396,219 @@ class GitHubClient:
             return resp.get("default_branch", "main")
         return "main"
 
+    def rate_budget(self) -> dict:
+        """Current API budget (limit, remaining, reset_in, blocked_for)."""
+        return self.rate_limiter.budget()
+
     # ─── Internal ───────────────────────────────────────────────────────
 
     def _request(self, method: str, url: str, **kwargs) -> Optional[dict | list]:
-        """Make an authenticated GitHub API request."""
+        """
+        Make an authenticated GitHub API request.
+
+        GET requests go through the response cache (if configured): a stored
+        ETag / Last-Modified is sent back and a 304 returns the cached body.
+        """
+        data, _ = self._request_page(method, url, **kwargs)
+        return data
+
+    def _request_page(
+        self, method: str, url: str, **kwargs
+    ) -> tuple[Optional[dict | list], dict]:
+        """
+        Like _request, but also return the response's Link relations.
+
+        Returns:
+            Tuple of (parsed body or None, {rel: url} from the Link header)
+        """
+        cache_key = None
+        if method == "GET" and self.cache is not None:
+            cache_key = ResponseCache.make_key(method, url, kwargs.get("params"))
+            conditional = self.cache.conditional_headers(cache_key)
+            if conditional:
+                kwargs["headers"] = {**conditional, **(kwargs.get("headers") or {})}
+
         try:
-            resp = self.session.request(method, url, **kwargs)
+            resp = self._send(method, url, **kwargs)
+            if resp is None:
+                return None, {}
+
+            if resp.status_code == 304 and cache_key:
+                cached = self.cache.not_modified(cache_key)
+                if cached is not None:
+                    return cached["body"], cached.get("links") or {}
+                # Entry vanished between lookup and response — refetch in full
+                headers = {
+                    k: v for k, v in (kwargs.get("headers") or {}).items()
+                    if k not in ("If-None-Match", "If-Modified-Since")
+                }
+                kwargs["headers"] = headers
+                resp = self._send(method, url, **kwargs)
+                if resp is None:
+                    return None, {}
 
             if resp.status_code == 204:
-                return {}
+                return {}, {}
 
             if resp.status_code >= 400:
                 logger.error(
                     f"GitHub API {method} {url} returned {resp.status_code}: "
                     f"{resp.text[:500]}"
                 )
-                return None
+                return None, {}
 
+            links = {
+                rel: link["url"] for rel, link in (resp.links or {}).items()
+                if "url" in link
+            }
             if resp.text:
-                return resp.json()
-            return {}
-
-        except requests.RequestException as e:
+                data = resp.json()
+                if cache_key:
+                    self.cache.record_miss()
+                    self.cache.store(
+                        cache_key,
+                        resp.headers.get("ETag"),
+                        resp.headers.get("Last-Modified"),
+                        data,
+                        links=links,
+                    )
+                return data, links
+            return {}, links
+
+        except (requests.RequestException, ValueError) as e:
             logger.error(f"GitHub API request failed: {e}")
-            return None
+            return None, {}
+
+    def _paginate(
+        self, url: str, params: Optional[dict] = None, reverse: bool = False
+    ) -> Iterator[dict]:
+        """
+        Lazily iterate over every item of a paginated list endpoint.
+
+        Follows rel="next" links one page at a time, so a caller that stops
+        iterating early never fetches the remaining pages. With reverse=True
+        it jumps to rel="last" and walks rel="prev" links, yielding the
+        newest items first.
+        """
+        first, links = self._request_page("GET", url, params=params)
+        if not isinstance(first, list):
+            return
+
+        if not reverse:
+            yield from first
+            next_url = links.get("next")
+            while next_url:
+                page, links = self._request_page("GET", next_url)
+                if not isinstance(page, list):
+                    return
+                yield from page
+                next_url = links.get("next")
+            return
+
+        last_url = links.get("last")
+        if not last_url:
+            # Everything fits on the first page
+            yield from reversed(first)
+            return
+
+        page_url = last_url
+        while page_url:
+            page, page_links = self._request_page("GET", page_url)
+            if not isinstance(page, list):
+                return
+            yield from reversed(page)
+            prev_url = page_links.get("prev")
+            if not prev_url:
+                # That was the first page itself
+                return
+            if prev_url == page_links.get("first"):
+                # Don't refetch the first page — we already have it
+                break
+            page_url = prev_url
+        yield from reversed(first)
+
+    def _send(self, method: str, url: str, **kwargs) -> Optional[requests.Response]:
+        """
+        Send a request, pacing against the rate limit and retrying when safe.
+
+        - Rate-limited responses (429, or 403 with an exhausted budget /
+          Retry-After / secondary-limit message) are retried for any method,
+          since GitHub did not process the request.
+        - 5xx responses and connection errors are retried with jittered
+          exponential backoff, but only for idempotent methods.
+
+        Returns:
+            The final response, or None if nothing could be sent.
+        """
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        resp = None
+
+        for attempt in range(self.max_retries + 1):
+            if not self.rate_limiter.acquire():
+                logger.error(
+                    f"GitHub API budget exhausted, not sending {method} {url} "
+                    f"(budget: {self.rate_limiter.budget()})"
+                )
+                return None
+
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                if idempotent and attempt < self.max_retries:
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                    logger.warning(
+                        f"GitHub API {method} {url} failed ({e}), "
+                        f"retrying in {delay:.1f}s"
+                    )
+                    time.sleep(delay)
+                    continue
+                logger.error(f"GitHub API request failed: {e}")
+                return None
+
+            self.rate_limiter.update(resp.headers)
+
+            if self._is_rate_limited(resp):
+                wait = retry_after_seconds(resp.headers)
+                if wait is None and resp.headers.get("X-RateLimit-Remaining") != "0":
+                    # Secondary limit without Retry-After: GitHub asks for >= 1 minute
+                    wait = 60.0
+                if wait is not None:
+                    self.rate_limiter.block_for(wait)
+                if attempt < self.max_retries:
+                    logger.warning(
+                        f"GitHub API {method} {url} rate limited "
+                        f"({resp.status_code}), retrying"
+                    )
+                    continue
+                return resp
+
+            if (
+                resp.status_code in RETRYABLE_STATUSES
+                and idempotent and attempt < self.max_retries
+            ):
+                delay = retry_after_seconds(resp.headers)
+                if delay is None:
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                logger.warning(
+                    f"GitHub API {method} {url} returned {resp.status_code}, "
+                    f"retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                continue
+
+            return resp
+
+        return resp
+
+    @staticmethod
+    def _is_rate_limited(resp: requests.Response) -> bool:
+        """Check whether a response is a primary or secondary rate-limit rejection."""
+        if resp.status_code == 429:
+            return True
+        if resp.status_code != 403:
+            return False
+        if resp.headers.get("X-RateLimit-Remaining") == "0":
+            return True
+        if resp.headers.get("Retry-After") is not None:
+            return True
+        return "rate limit" in (resp.text or "").lower()
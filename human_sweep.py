@@ -0,0 +1,143 @@
+"""
+human_sweep.py — Find awaiting-human issues the human has actually responded to.
+
+Instead of fetching every awaiting-human issue and its comments on each
+poll, the sweep remembers the newest `updated_at` it has seen and asks
+GitHub only for issues updated since then. Only those issues get their
+latest comment checked.
+"""
+
+import json
+import os
+import logging
+from typing import Optional
+
+from github_client import GitHubClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = os.environ.get("DATA_DIR", "/data")
+
+
+class AwaitingHumanSweep:
+    """
+    Tracks awaiting-human issues between polls. Runs on the main loop only;
+    state persists across restarts.
+    """
+
+    def __init__(self, github: GitHubClient, data_dir: str = DEFAULT_DATA_DIR):
+        self.github = github
+        self.data_file = os.path.join(data_dir, "awaiting_sweep.json")
+        os.makedirs(data_dir, exist_ok=True)
+        # Responses returned but not yet handled: number -> (updated_at, comment id)
+        self._pending: dict[int, tuple[str, int]] = {}
+        self._load()
+
+    def responded_issues(self, skip: Optional[set[int]] = None) -> list[dict]:
+        """
+        Awaiting-human issues with a new comment from the human.
+
+        Args:
+            skip: Issue numbers to ignore this time (e.g. running on a worker);
+                they are re-checked on the next sweep
+
+        Returns:
+            Issue dicts ready for TaskRunner.handle_human_response. Each is
+            returned again by later sweeps until mark_handled() is called
+            for it.
+        """
+        skip = skip or set()
+        since = self.data.get("watermark")
+        changed = list(self.github.iter_awaiting_human_issues(since=since))
+
+        if changed:
+            logger.info(
+                f"Found {len(changed)} awaiting-human issue(s) updated"
+                + (f" since {since}" if since else "")
+            )
+
+        responded = []
+        newest = since
+        oldest_skipped = None
+        seen = self.data.setdefault("seen", {})
+
+        for issue in changed:
+            number = issue["number"]
+            key = str(number)
+            updated_at = issue.get("updated_at") or ""
+
+            if number in skip:
+                if updated_at and (oldest_skipped is None or updated_at < oldest_skipped):
+                    oldest_skipped = updated_at
+                continue
+
+            if updated_at and (newest is None or updated_at > newest):
+                newest = updated_at
+
+            entry = seen.get(key, {})
+            if entry.get("updated_at") == updated_at:
+                # Returned only because `since` is inclusive
+                continue
+
+            latest = self.github.get_latest_comment(number, fresh=True)
+            author = (latest or {}).get("user", {}).get("login", "")
+            if (
+                author == self.github.human_username
+                and entry.get("comment_id") != latest.get("id")
+            ):
+                # Recorded by mark_handled; until then, hold the watermark
+                self._pending[number] = (updated_at, latest.get("id"))
+                if updated_at and (oldest_skipped is None or updated_at < oldest_skipped):
+                    oldest_skipped = updated_at
+                responded.append(issue)
+                continue
+
+            # No comment, not the human's, or already handled (e.g. it
+            # didn't match any keyword)
+            entry["updated_at"] = updated_at
+            seen[key] = entry
+
+        # Never move the watermark past an issue we skipped or haven't handled
+        if oldest_skipped and newest and oldest_skipped < newest:
+            newest = oldest_skipped
+
+        if changed:
+            self.data["watermark"] = newest
+            self._save()
+
+        return responded
+
+    def mark_handled(self, issue_number: int):
+        """Record that a response returned by responded_issues() was processed."""
+        pending = self._pending.pop(issue_number, None)
+        if not pending:
+            return
+        updated_at, comment_id = pending
+        self.data.setdefault("seen", {})[str(issue_number)] = {
+            "updated_at": updated_at, "comment_id": comment_id,
+        }
+        self._save()
+
+    # ─── Persistence ────────────────────────────────────────────────────
+
+    def _load(self):
+        """Load sweep state from disk."""
+        if os.path.exists(self.data_file):
+            try:
+                with open(self.data_file, "r") as f:
+                    self.data = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Failed to load awaiting-human sweep state: {e}")
+                self.data = {}
+        else:
+            self.data = {}
+
+    def _save(self):
+        """Persist sweep state to disk (atomically, via a temp file)."""
+        tmp_file = f"{self.data_file}.tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(tmp_file, self.data_file)
+        except IOError as e:
+            logger.error(f"Failed to save awaiting-human sweep state: {e}")
@@ -2,24 +2,35 @@
 main.py — Entry point for the Claude Task Runner.
 
 Runs continuously, polling GitHub for tasks labelled 'claude' + 'ready'.
-Respects night-only scheduling and daily task limits.
+Respects night-only scheduling and daily task limits, and can drive several
+tasks in parallel (limits.max_concurrent_tasks).
 """
 
 import os
 import sys
-import time
 import signal
 import logging
+import threading
 import yaml
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 
 import pytz
 
 from github_client import GitHubClient
+from response_cache import ResponseCache
+from rate_limiter import RateLimiter
 from worktree_manager import WorktreeManager
+from dep_cache import DependencyCache
 from task_runner import TaskRunner
-from task_parser import parse_issue, PRIORITY_ORDER
+from task_parser import PRIORITY_ORDER
 from recurring import RecurringTracker
+from human_sweep import AwaitingHumanSweep
+from claude_sessions import SessionStore
+from scheduler import TaskGraph
+from task_queue import ReadyQueue, StageTimings, DEFAULT_EXPECTED_MINUTES
+from task_state import TaskStateStore, ACTIVE_STAGES
+from worker_pool import WorkerPool
+from webhook_server import WebhookListener, WebhookEvent
 
 # ─── Logging ────────────────────────────────────────────────────────────
 
@@ -40,6 +51,7 @@ logger = logging.getLogger("claude-task-runner")
 # ─── Globals ────────────────────────────────────────────────────────────
 
 shutdown_requested = False
+wake_event = threading.Event()
 
 
 def handle_signal(signum, frame):
@@ -98,21 +110,58 @@ def is_in_night_window(config: dict) -> bool:
     return start <= now.hour < end
 
 
+def night_window_minutes_left(config: dict) -> float:
+    """Minutes until the night window closes (0 outside it)."""
+    if not is_in_night_window(config):
+        return 0.0
+    schedule = config.get("schedule", {})
+    tz = pytz.timezone(schedule.get("timezone", "UTC"))
+    now = datetime.now(tz)
+    end = now.replace(hour=schedule.get("night_window_end", 8), minute=0, second=0, microsecond=0)
+    return max(0.0, (end - now).total_seconds() / 60)
+
+
 class DailyCounter:
-    """Track tasks completed today."""
+    """
+    Track tasks completed today.
+
+    Thread-safe: workers reserve a slot before starting so that tasks still
+    in flight count towards the daily cap.
+    """
 
     def __init__(self, max_per_day: int):
         self.max_per_day = max_per_day
         self.count = 0
+        self.pending = 0
         self.today = date.today()
+        self._lock = threading.Lock()
 
     def can_run(self) -> bool:
-        self._reset_if_new_day()
-        return self.count < self.max_per_day
+        with self._lock:
+            self._reset_if_new_day()
+            return self.count + self.pending < self.max_per_day
 
     def increment(self):
-        self._reset_if_new_day()
-        self.count += 1
+        with self._lock:
+            self._reset_if_new_day()
+            self.count += 1
+
+    def reserve(self) -> bool:
+        """Claim a slot for a task about to start. Returns False if at the cap."""
+        with self._lock:
+            self._reset_if_new_day()
+            if self.count + self.pending >= self.max_per_day:
+                return False
+            self.pending += 1
+            return True
+
+    def release(self, completed: bool):
+        """Release a reserved slot, counting it if the task completed."""
+        with self._lock:
+            self._reset_if_new_day()
+            self.pending = max(0, self.pending - 1)
+            if completed:
+                self.count += 1
 
     def _reset_if_new_day(self):
         if date.today() != self.today:
@@ -122,52 +171,166 @@ class DailyCounter:
 
 # ─── Task Selection ─────────────────────────────────────────────────────
 
-def select_task(issues: list[dict], config: dict, recurring: RecurringTracker) -> dict | None:
+def select_task(
+    issues: list[dict], config: dict, recurring: RecurringTracker,
+    graph: TaskGraph | None = None,
+) -> dict | None:
     """
     Select the best task to work on next.
 
     Priority order:
     1. Filter out night-only tasks if not in night window
     2. Filter out recurring tasks that aren't due
-    3. Sort by priority (high > medium > low)
-    4. Pick the first one
+    3. Filter out tasks whose dependencies aren't done (with a graph)
+    4. Sort by priority (high > medium > low) — with a graph, the priority
+       inherited from waiting tasks, then the longest chain unblocked
+    5. Pick the first one
+    """
+    selected = select_tasks(issues, config, recurring, limit=1, graph=graph)
+    return selected[0] if selected else None
+
+
+def select_tasks(
+    issues: list[dict], config: dict, recurring: RecurringTracker,
+    limit: int = 1, exclude: set[int] | None = None,
+    graph: TaskGraph | None = None,
+    queue: ReadyQueue | None = None,
+    timings: StageTimings | None = None,
+) -> list[dict]:
+    """
+    Select up to `limit` eligible tasks, best first.
+
+    Same filtering as select_task; issues whose number is in `exclude`
+    (e.g. already running on a worker) are skipped, and so are tasks
+    sharing a group with one of them or with a task selected earlier.
+
+    Ordering is by the ready queue's score — priority (inherited from
+    waiting tasks with a graph), plus aging, against expected runtime
+    from `timings`. In the night window, tasks expected to overrun it go
+    last; the longest chain of blocked work breaks ties.
     """
     in_night = is_in_night_window(config)
+    exclude = exclude or set()
+    if queue is None:
+        queue = ReadyQueue(data_dir=None)
+    by_number = {issue["number"]: issue for issue in issues}
 
     candidates = []
-    for issue in issues:
-        task = parse_issue(issue)
+    for entry in queue.sync(issues):
+        if entry.issue_number in exclude:
+            continue
 
         # Filter night-only tasks
-        if task.night_only and not in_night:
-            logger.debug(f"Skipping #{task.issue_number} (night-only, not in window)")
+        if entry.night_only and not in_night:
+            logger.debug(f"Skipping #{entry.issue_number} (night-only, not in window)")
             continue
 
         # Filter recurring tasks not yet due
-        if task.schedule != "once":
-            if not recurring.is_due(task.issue_number, task.schedule):
-                logger.debug(f"Skipping #{task.issue_number} (recurring, not due)")
+        if entry.schedule != "once":
+            if not recurring.is_due(entry.issue_number, entry.schedule):
+                logger.debug(f"Skipping #{entry.issue_number} (recurring, not due)")
                 continue
 
         # Check dependencies
-        if task.depends_on:
-            # TODO: check if dependencies are resolved
-            pass
+        if graph is not None:
+            blocked_by = graph.blocked_by(entry)
+            if blocked_by:
+                logger.debug(
+                    f"Skipping #{entry.issue_number} (waiting on "
+                    f"{', '.join(f'#{n}' for n in blocked_by)})"
+                )
+                continue
 
-        candidates.append((task, issue))
+        candidates.append(entry)
 
     if not candidates:
-        return None
+        return []
+
+    now = datetime.now(timezone.utc)
+    window_left = night_window_minutes_left(config) if in_night else None
+    priority_names = {order: name for name, order in PRIORITY_ORDER.items()}
+    ranked = []
+    for entry in candidates:
+        if graph is not None:
+            inherited, chain = graph.rank(entry)
+        else:
+            inherited, chain = PRIORITY_ORDER.get(entry.priority, 1), 0
+        expected = (
+            timings.expected_minutes(entry.repo) if timings else DEFAULT_EXPECTED_MINUTES
+        )
+        score = queue.score(entry, expected, now, priority=priority_names.get(inherited))
+        overruns = window_left is not None and expected > window_left
+        ranked.append(((overruns, -score, chain, entry.issue_number), entry, score, expected))
+    ranked.sort(key=lambda r: r[0])
+
+    # One task per group at a time
+    busy_groups = {graph.group_of(n) for n in exclude} if graph is not None else set()
+    selected = []
+    for _, entry, score, expected in ranked:
+        if len(selected) >= limit:
+            break
+        if entry.group and entry.group in busy_groups:
+            logger.debug(f"Skipping #{entry.issue_number} (group {entry.group} busy)")
+            continue
+        if entry.group:
+            busy_groups.add(entry.group)
+        selected.append(entry)
+        logger.info(
+            f"Selected task #{entry.issue_number}: {entry.title} "
+            f"(priority: {entry.priority}, score {score:.2f}, ~{expected:.0f} min)"
+        )
+    return [by_number[entry.issue_number] for entry in selected]
+
+
+def resume_in_flight(
+    github: GitHubClient, states: TaskStateStore, pool: WorkerPool,
+    daily_counter: DailyCounter,
+) -> int:
+    """
+    Re-dispatch tasks a previous process was driving when it stopped.
 
-    # Sort by priority
-    candidates.sort(key=lambda x: PRIORITY_ORDER.get(x[0].priority, 1))
+    Their labels still show an active stage, so they'd never be selected
+    as 'ready' again. Each resumes from its saved state and checkpoint.
 
-    selected_task, selected_issue = candidates[0]
-    logger.info(
-        f"Selected task #{selected_task.issue_number}: {selected_task.title} "
-        f"(priority: {selected_task.priority})"
-    )
-    return selected_issue
+    Returns:
+        Number of tasks dispatched
+    """
+    dispatched = 0
+    busy = pool.in_flight()
+    for record in states.in_flight():
+        number = record.state.issue_number
+        if number in busy:
+            continue
+        if pool.free_slots() <= 0:
+            break
+
+        issue = github.get_issue(number)
+        labels = {l["name"] for l in (issue or {}).get("labels", [])}
+        if not issue or issue.get("state") == "closed" or labels & {"done", "failed"}:
+            # Finished or gone: nothing to resume
+            states.forget(number)
+            continue
+        if not labels & set(ACTIVE_STAGES):
+            # Awaiting a human or sent back to ready: keep the record (cycles,
+            # PR) but take it out of the in-flight set so it isn't re-fetched
+            record.state.current_stage = (
+                "awaiting-human" if "awaiting-human" in labels else "ready"
+            )
+            states.save(record.state)
+            continue
+
+        if not daily_counter.reserve():
+            break
+        logger.info(
+            f"Resuming #{number} in {record.state.current_stage}"
+            + (f" from checkpoint '{record.checkpoint}'" if record.checkpoint else "")
+            + f" (stage attempt {record.stage_attempts + 1})"
+        )
+        if pool.submit(issue):
+            dispatched += 1
+        else:
+            daily_counter.release(completed=False)
+    return dispatched
 
 
 # ─── Main Loop ──────────────────────────────────────────────────────────
@@ -189,27 +352,124 @@ def main():
 
     # Initialize components
     github_config = config.get("github", {})
+    cache_config = github_config.get("cache", {})
+    response_cache = None
+    if cache_config.get("enabled", True):
+        response_cache = ResponseCache(
+            max_entries=cache_config.get("max_entries", 500),
+            persist=cache_config.get("persist", True),
+            max_disk_entries=cache_config.get("max_disk_entries", 2000),
+        )
+    rate_config = github_config.get("rate_limit", {})
     github = GitHubClient(
         token=github_token,
         task_repo=github_config.get("task_repo", ""),
         human_username=github_config.get("human_username", ""),
+        cache=response_cache,
+        rate_limiter=RateLimiter(
+            reserve=rate_config.get("reserve", 100),
+            max_wait_seconds=rate_config.get("max_wait_seconds", 900),
+        ),
+        max_retries=rate_config.get("max_retries", 3),
+        backoff_base=rate_config.get("backoff_base", 1.0),
+        backoff_max=rate_config.get("backoff_max", 60.0),
+        comment_refresh_seconds=github_config.get("comment_refresh_seconds", 30),
     )
 
-    worktree_manager = WorktreeManager(github_token=github_token)
+    workspace_config = config.get("workspace", {})
+    cache_max_gb = workspace_config.get("repo_cache_max_gb")
+    deps_config = workspace_config.get("dependency_cache", {})
+    dep_cache = None
+    if deps_config.get("enabled", True):
+        deps_max_gb = deps_config.get("max_gb", 10)
+        dep_cache = DependencyCache(
+            max_bytes=int(deps_max_gb * 1024 ** 3) if deps_max_gb else None,
+            link=deps_config.get("link", "auto"),
+        )
+    worktree_manager = WorktreeManager(
+        github_token=github_token,
+        cache_max_bytes=int(cache_max_gb * 1024 ** 3) if cache_max_gb else None,
+        cache_max_age_days=workspace_config.get("repo_cache_max_age_days"),
+        clone_strategies=workspace_config.get("clone_strategies"),
+        dep_cache=dep_cache,
+    )
     recurring_tracker = RecurringTracker()
+    task_graph = TaskGraph(github.get_issue)
+    scheduling_config = config.get("scheduling", {})
+    ready_queue = ReadyQueue(
+        aging_per_day=scheduling_config.get("aging_per_day", 0.5),
+        max_aging=scheduling_config.get("max_aging", 3.0),
+        cost_weight=scheduling_config.get("cost_weight", 0.25),
+    )
+    stage_timings = StageTimings()
+    task_states = TaskStateStore()
+    human_sweep = AwaitingHumanSweep(github)
+    # Resume each task's Claude CLI session across stages
+    sessions = SessionStore() if config.get("claude", {}).get("reuse_sessions", True) else None
 
     limits = config.get("limits", {})
     daily_counter = DailyCounter(max_per_day=limits.get("max_tasks_per_day", 10))
 
     polling_interval = config.get("polling_interval_minutes", 5) * 60
 
+    def on_task_complete(issue_number: int, completed: bool):
+        daily_counter.release(completed)
+        worktree_manager.evict_repo_cache()
+        if completed:
+            logger.info(
+                f"Tasks completed today: {daily_counter.count}/"
+                f"{daily_counter.max_per_day}"
+            )
+        # Wake the poll loop so the freed worker picks up more work
+        wake_event.set()
+
+    pool = WorkerPool(
+        max_workers=limits.get("max_concurrent_tasks", 1),
+        runner_factory=lambda: TaskRunner(
+            github, worktree_manager, recurring_tracker, config, sessions,
+            stage_timings, task_states,
+        ),
+        on_complete=on_task_complete,
+    )
+
+    # Optional webhook listener: events wake the loop immediately and
+    # polling drops to a slow reconciliation pass
+    webhook_config = config.get("webhook", {})
+    listener = None
+    if webhook_config.get("enabled", False):
+        webhook_secret = webhook_config.get("secret") or ""
+        if webhook_secret.startswith("${"):
+            webhook_secret = ""  # env var not set
+        listener = WebhookListener(
+            secret=webhook_secret,
+            task_repo=github_config.get("task_repo", ""),
+            host=webhook_config.get("host", "0.0.0.0"),
+            port=webhook_config.get("port", 8080),
+            path=webhook_config.get("path", "/webhook"),
+            on_event=wake_event.set,
+        )
+        if listener.start():
+            polling_interval = webhook_config.get(
+                "reconciliation_interval_minutes", 30
+            ) * 60
+        else:
+            listener = None
+
+    # Remove worktrees left over from a previous run, except those of tasks
+    # to resume or awaiting a human; from here on each task cleans up only
+    # its own worktree.
+    worktree_manager.cleanup_all(keep=task_states.worktree_paths())
+    worktree_manager.evict_repo_cache()
+
     # Ensure labels exist in the task repo
     logger.info("Ensuring required labels exist...")
     github.ensure_labels_exist()
 
     logger.info(
         f"Polling {github_config.get('task_repo')} every "
-        f"{config.get('polling_interval_minutes', 5)} minutes"
+        f"{polling_interval // 60} minutes "
+        f"with {pool.max_workers} worker(s)"
+        + (" (webhooks enabled)" if listener else "")
     )
     logger.info(
         f"Night window: {config['schedule']['night_window_start']}:00 - "
@@ -220,64 +480,82 @@ def main():
     # ─── Poll Loop ──────────────────────────────────────────────────
 
     while not shutdown_requested:
+        # Stretch the poll interval automatically when the API budget runs low
+        interval = github.rate_limiter.stretch_interval(polling_interval)
+        if interval > polling_interval:
+            logger.info(
+                f"GitHub API budget low ({github.rate_budget()}), "
+                f"polling every {interval // 60} minutes"
+            )
+
         try:
+            if listener:
+                _ingest_webhook_events(github, listener.drain())
+
             if not daily_counter.can_run():
                 logger.info(
                     f"Daily task limit reached ({daily_counter.max_per_day}). "
                     "Waiting for tomorrow."
                 )
-                _sleep(polling_interval)
+                _sleep(interval)
                 continue
 
-            # Check for issues labelled 'claude' + 'awaiting-human'
-            awaiting = github.get_awaiting_human_issues()
-            if awaiting:
-                logger.info(f"Found {len(awaiting)} awaiting-human issue(s)")
-                runner = TaskRunner(github, worktree_manager, recurring_tracker, config)
-                for aw_issue in awaiting:
-                    issue_num = aw_issue["number"]
-                    comments = github.get_issue_comments(issue_num)
-                    if comments:
-                        latest = comments[-1]
-                        author = latest.get("user", {}).get("login", "")
-                        if author == github.human_username:
-                            logger.info(
-                                f"Human responded on #{issue_num}, processing..."
-                            )
-                            runner.handle_human_response(aw_issue)
-
-            # Check for issues labelled 'claude' + 'ready'
-            issues = github.get_ready_issues()
+            # Check awaiting-human issues that changed since the last sweep
+            responded = human_sweep.responded_issues(skip=pool.in_flight())
+            if responded:
+                runner = TaskRunner(
+                    github, worktree_manager, recurring_tracker, config, sessions,
+                    stage_timings, task_states,
+                )
+                for aw_issue in responded:
+                    logger.info(
+                        f"Human responded on #{aw_issue['number']}, processing..."
+                    )
+                    runner.handle_human_response(aw_issue)
+                    human_sweep.mark_handled(aw_issue["number"])
+
+            # Tasks interrupted by a restart go before new work
+            resume_in_flight(github, task_states, pool, daily_counter)
+
+            free_slots = pool.free_slots()
+            if free_slots <= 0:
+                logger.info("All workers busy")
+                _sleep(interval)
+                continue
+
+            # Refresh the dependency graph, then pick from 'claude' + 'ready'
+            open_issues = github.get_open_task_issues()
+            task_graph.update(open_issues)
+            issues = [
+                i for i in open_issues
+                if any(l["name"] == "ready" for l in i.get("labels", []))
+            ]
             logger.info(f"Found {len(issues)} ready task(s)")
 
             if not issues:
-                _sleep(polling_interval)
+                _sleep(interval)
                 continue
 
-            # Select the best task
-            selected = select_task(issues, config, recurring_tracker)
+            # Select the best tasks for the free workers
+            selected = select_tasks(
+                issues, config, recurring_tracker,
+                limit=free_slots, exclude=pool.in_flight(), graph=task_graph,
+                queue=ready_queue, timings=stage_timings,
+            )
             if not selected:
                 logger.info("No eligible tasks to run right now")
-                _sleep(polling_interval)
+                _sleep(interval)
                 continue
 
-            # Run the task through its full lifecycle
-            runner = TaskRunner(github, worktree_manager, recurring_tracker, config)
-            completed = runner.run(selected)
+            # Run each task through its full lifecycle on a worker
+            for issue in selected:
+                if not daily_counter.reserve():
+                    break
+                if not pool.submit(issue):
+                    daily_counter.release(completed=False)
 
-            if completed:
-                daily_counter.increment()
-                logger.info(
-                    f"Tasks completed today: {daily_counter.count}/"
-                    f"{daily_counter.max_per_day}"
-                )
-
-            # Clean up between tasks
-            worktree_manager.cleanup_all()
-
-            # Brief pause before next poll
-            if not shutdown_requested:
-                time.sleep(10)
+            # Wait for the next poll, or until a worker frees up
+            _sleep(interval)
 
         except KeyboardInterrupt:
             logger.info("Interrupted by user")
@@ -285,17 +563,43 @@ def main():
 
         except Exception as e:
             logger.exception(f"Unhandled error in main loop: {e}")
-            _sleep(polling_interval)
+            _sleep(interval)
 
+    if listener:
+        listener.stop()
+    pool.shutdown(wait=True)
     logger.info("Claude Task Runner shut down")
 
 
+def _ingest_webhook_events(github: GitHubClient, events: list[WebhookEvent]):
+    """
+    Fold webhook payloads into the client's local views so the poll cycle
+    they triggered sees the change without waiting for caches to expire.
+    """
+    for event in events:
+        issue = event.issue
+        if not issue:
+            continue
+        github.note_issue(issue)
+        if event.event == "issue_comment":
+            if event.action == "created" and event.comment:
+                github.comments.add_local(issue["number"], event.comment)
+            else:
+                # Edited or deleted — reload the thread next time
+                github.comments.invalidate(issue["number"])
+
+
 def _sleep(seconds: int):
-    """Sleep in small increments to allow for graceful shutdown."""
+    """
+    Sleep in small increments to allow for graceful shutdown.
+    Returns early if something sets wake_event (e.g. a worker finishing).
+    """
     global shutdown_requested
     elapsed = 0
     while elapsed < seconds and not shutdown_requested:
-        time.sleep(min(5, seconds - elapsed))
+        if wake_event.wait(min(5, seconds - elapsed)):
+            wake_event.clear()
+            return
         elapsed += 5
 
 
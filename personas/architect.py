@@ -3,9 +3,15 @@ architect.py — Architect persona: designs solutions and performs code reviews.
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from .base import BasePersona
 from task_parser import Task
 from worktree_manager import WorktreeManager
+from claude_sessions import SessionStore
+from context_budget import (
+    REQUIRED, HIGH, LOW, estimate_tokens, split_diff, chunk_diff,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -48,8 +54,11 @@ Then list specific, actionable changes needed.
 
 Be thorough but pragmatic. Don't block on style nitpicks."""
 
-    def __init__(self, github, config, worktree_manager: WorktreeManager):
-        super().__init__(github, config)
+    def __init__(
+        self, github, config, worktree_manager: WorktreeManager,
+        sessions: Optional[SessionStore] = None,
+    ):
+        super().__init__(github, config, sessions)
         self.worktree_manager = worktree_manager
 
     def execute_design(self, task: Task, worktree_path: str) -> bool:
@@ -66,7 +75,9 @@ Be thorough but pragmatic. Don't block on style nitpicks."""
         logger.info(f"[Architect] Designing solution for #{task.issue_number}: {task.title}")
 
         prompt = self._build_design_prompt(task, worktree_path)
-        success, output = self.invoke_claude(prompt, working_dir=worktree_path, max_turns=10)
+        success, output = self.invoke_claude(
+            prompt, working_dir=worktree_path, max_turns=10, task=task,
+        )
 
         if not success:
             self.fail(task, f"Architecture design failed:\n```\n{output[:500]}\n```")
@@ -102,17 +113,21 @@ Be thorough but pragmatic. Don't block on style nitpicks."""
             f"#{task.issue_number}: {task.title}"
         )
 
-        # Get the PR diff
-        diff = self.github.get_pr_diff(task.repo, task.pr_number)
+        # Get the PR diff (locally from the worktree if it's still there)
+        diff, pr_files = self.get_pr_changes(task, self.worktree_manager)
         if not diff:
             self.fail(task, "Could not retrieve PR diff for review")
             return "failed"
 
-        # Get the conversation context (includes design plan)
-        issue_context = self.get_issue_context(task)
-
-        prompt = self._build_review_prompt(task, diff, issue_context)
-        success, output = self.invoke_claude(prompt, max_turns=5)
+        review_config = self.config.get("review", {})
+        threshold = review_config.get("chunked_above_tokens", 12000)
+        if review_config.get("chunked", True) and estimate_tokens(diff) > threshold:
+            success, output = self._chunked_review(task, diff, pr_files)
+        else:
+            prompt = self._build_review_prompt(task, diff)
+            success, output = self.invoke_claude(
+                prompt, max_turns=5, stop_on_verdict=True, task=task,
+            )
 
         if not success:
             self.fail(task, f"Code review failed:\n```\n{output[:500]}\n```")
@@ -153,6 +168,139 @@ Be thorough but pragmatic. Don't block on style nitpicks."""
             self.transition(task, "development")
             return "changes_required"
 
+    def _chunked_review(
+        self, task: Task, diff: str, pr_files: Optional[list[dict]] = None
+    ) -> tuple[bool, str]:
+        """
+        Review a large diff map-reduce style: review file groups concurrently,
+        then merge their findings into one REVIEW_VERDICT.
+
+        Returns:
+            Tuple of (success, output of the merge pass)
+        """
+        review_config = self.config.get("review", {})
+        chunk_tokens = review_config.get("chunk_tokens", 8000)
+        max_parallel = max(1, review_config.get("max_parallel", 3))
+
+        if pr_files is None:
+            pr_files = self.github.get_pr_files(task.repo, task.pr_number)
+        files = self._review_files(diff, pr_files)
+        chunks = chunk_diff(files, chunk_tokens)
+        all_paths = [path for path, _ in files]
+        logger.info(
+            f"[Architect] Reviewing PR #{task.pr_number} in {len(chunks)} chunk(s), "
+            f"{min(max_parallel, len(chunks))} at a time"
+        )
+
+        def review_chunk(index: int) -> tuple[bool, str]:
+            prompt = self._build_chunk_prompt(task, chunks[index], index, len(chunks), all_paths)
+            # Chunks run side by side, so they don't share the task's session
+            return self.invoke_claude(prompt, max_turns=3, stop_on_verdict=True)
+
+        with ThreadPoolExecutor(
+            max_workers=min(max_parallel, len(chunks)), thread_name_prefix="review-chunk",
+        ) as pool:
+            results = list(pool.map(review_chunk, range(len(chunks))))
+
+        failed = [i + 1 for i, (ok, _) in enumerate(results) if not ok]
+        if failed:
+            first_error = results[failed[0] - 1][1]
+            return False, f"Review of chunk(s) {failed} failed: {first_error}"
+
+        prompt = self._build_reduce_prompt(task, chunks, [out for _, out in results])
+        return self.invoke_claude(
+            prompt, max_turns=3, stop_on_verdict=True, task=task,
+            model=review_config.get("reduce_model"),
+        )
+
+    def _review_files(self, diff: str, pr_files: list[dict]) -> list[tuple[str, str]]:
+        """
+        Per-file diffs for a PR, in the order the files are listed. Files
+        missing from the combined diff fall back to their listed patch.
+        """
+        by_path = dict(split_diff(diff))
+        files = []
+        for f in pr_files:
+            path = f["filename"]
+            if path in by_path:
+                files.append((path, by_path.pop(path)))
+            elif f.get("patch"):
+                old_path = f.get("previous_filename", path)
+                files.append((path, f"diff --git a/{old_path} b/{path}\n{f['patch']}"))
+            else:
+                status = f.get("status", "changed")
+                files.append((path, f"diff --git a/{path} b/{path}\n({status}, no patch available)"))
+        # Anything in the diff that the file listing didn't include
+        files.extend(by_path.items())
+        return files
+
+    def _build_chunk_prompt(
+        self, task: Task, chunk: list[tuple[str, str]], index: int, total: int,
+        all_paths: list[str],
+    ) -> str:
+        """Build the prompt reviewing one chunk of a large diff."""
+        labels = ", ".join(f"`{label}`" for label, _ in chunk)
+        parts = [
+            f"# Code Review (part {index + 1} of {total}): {task.title}",
+            f"\n## Issue #{task.issue_number} — PR #{task.pr_number}",
+            f"\nThis PR is too large to review in one pass. You are reviewing only "
+            f"these files: {labels}. Other parts are reviewed separately and the "
+            f"findings are merged afterwards.",
+        ]
+
+        context = self.new_context()
+        context.add("## Acceptance Criteria", task.acceptance_criteria, priority=REQUIRED)
+        context.add(
+            "## Diff (this part)", "\n".join(text for _, text in chunk),
+            priority=REQUIRED, fence="diff",
+        )
+        file_list = "\n".join(f"- `{p}`" for p in all_paths)
+        context.add("## All Files In This PR", file_list, priority=HIGH)
+        # Chunk calls start fresh sessions, so they need the whole thread
+        self.add_issue_context(
+            context, "## Design Plan & Discussion", task, resumable=False,
+        )
+        parts.extend(context.render())
+
+        parts.append(
+            "\n## Your Task\n"
+            "Review this part against the requirements and design plan. Check for "
+            "correctness, bugs, security issues, and test coverage. Reference "
+            "file paths and lines in your findings.\n"
+            "Output REVIEW_VERDICT: APPROVED or REVIEW_VERDICT: CHANGES_REQUIRED "
+            "followed by your findings for this part."
+        )
+        return "\n".join(parts)
+
+    def _build_reduce_prompt(
+        self, task: Task, chunks: list[list[tuple[str, str]]], findings: list[str]
+    ) -> str:
+        """Build the prompt that merges per-chunk findings into one verdict."""
+        parts = [
+            f"# Code Review Summary: {task.title}",
+            f"\n## Issue #{task.issue_number} — PR #{task.pr_number}",
+            f"\nThis PR was reviewed in {len(chunks)} parts. Each part's findings are below.",
+        ]
+
+        context = self.new_context()
+        context.add("## Acceptance Criteria", task.acceptance_criteria, priority=REQUIRED)
+        for i, (chunk, output) in enumerate(zip(chunks, findings), 1):
+            labels = ", ".join(f"`{label}`" for label, _ in chunk)
+            context.add(f"## Part {i}: {labels}", output, priority=REQUIRED - 1)
+        self.add_issue_context(context, "## Design Plan & Discussion", task)
+        parts.extend(context.render())
+
+        parts.append(
+            "\n## Your Task\n"
+            "Merge these findings into a single review. Drop duplicates and "
+            "anything a later part shows is handled elsewhere in the PR. Check "
+            "that the parts together meet the acceptance criteria. Require "
+            "changes if any real issue remains.\n"
+            "Output REVIEW_VERDICT: APPROVED or REVIEW_VERDICT: CHANGES_REQUIRED "
+            "followed by the merged, actionable list of notes."
+        )
+        return "\n".join(parts)
+
     def _build_design_prompt(self, task: Task, worktree_path: str) -> str:
         """Build the design prompt with codebase context."""
         tree_summary = self.worktree_manager.get_tree_summary(worktree_path)
@@ -164,16 +312,12 @@ Be thorough but pragmatic. Don't block on style nitpicks."""
             f"**New Repo:** {task.new_repo}",
         ]
 
-        # Include issue context (product owner's refined requirements)
-        issue_context = self.get_issue_context(task)
-        if issue_context:
-            parts.append(f"\n## Requirements & Discussion\n{issue_context}")
-
-        if task.full_prompt:
-            parts.append(f"\n## Original Task\n{task.full_prompt}")
-
-        if tree_summary:
-            parts.append(f"\n## Codebase Structure\n```\n{tree_summary[:2000]}\n```")
+        # Issue context holds the product owner's refined requirements
+        context = self.new_context()
+        self.add_issue_context(context, "## Requirements & Discussion", task, worktree_path)
+        context.add("## Original Task", task.full_prompt, priority=REQUIRED)
+        context.add("## Codebase Structure", tree_summary, priority=LOW, fence="")
+        parts.extend(context.render())
 
         parts.append(
             "\n## Your Task\n"
@@ -183,30 +327,25 @@ Be thorough but pragmatic. Don't block on style nitpicks."""
             "Output DESIGN_PLAN: followed by your plan."
         )
 
+        sparse_hint = self.worktree_manager.sparse_checkout_hint(worktree_path)
+        if sparse_hint:
+            parts.append(f"\n{sparse_hint}")
+
         return "\n".join(parts)
 
-    def _build_review_prompt(
-        self, task: Task, diff: str, issue_context: str
-    ) -> str:
+    def _build_review_prompt(self, task: Task, diff: str) -> str:
         """Build the code review prompt."""
-        # Truncate diff if extremely large
-        max_diff = 10000
-        truncated = diff[:max_diff]
-        if len(diff) > max_diff:
-            truncated += f"\n\n... (diff truncated, {len(diff) - max_diff} chars omitted)"
-
         parts = [
             f"# Code Review: {task.title}",
             f"\n## Issue #{task.issue_number} — PR #{task.pr_number}",
         ]
 
-        if task.acceptance_criteria:
-            parts.append(f"\n## Acceptance Criteria\n{task.acceptance_criteria}")
-
-        if issue_context:
-            parts.append(f"\n## Design Plan & Discussion\n{issue_context[:3000]}")
-
-        parts.append(f"\n## Pull Request Diff\n```diff\n{truncated}\n```")
+        # Conversation context includes the design plan
+        context = self.new_context()
+        context.add("## Acceptance Criteria", task.acceptance_criteria, priority=REQUIRED)
+        self.add_issue_context(context, "## Design Plan & Discussion", task)
+        context.add_diff("## Pull Request Diff", diff)
+        parts.extend(context.render())
 
         parts.append(
             "\n## Your Task\n"
@@ -5,12 +5,18 @@ base.py — Base persona with shared Claude CLI invocation logic.
 import subprocess
 import logging
 import os
+import uuid
 from typing import Optional
 from task_parser import Task
 from github_client import GitHubClient
+from claude_stream import ClaudeStream, ClaudeRunStats, STREAM_FLAGS
+from claude_sessions import SessionStore
+from context_budget import ContextAssembler
 
 logger = logging.getLogger(__name__)
 
+RESUMED_CONTEXT_NOTE = "(Earlier comments are already in this session — these are new.)"
+
 
 class BasePersona:
     """Base class for all agent personas."""
@@ -20,10 +26,20 @@ class BasePersona:
     persona_emoji: str = "🤖"
     system_prompt: str = "You are a helpful assistant."
 
-    def __init__(self, github: GitHubClient, config: dict):
+    def __init__(
+        self, github: GitHubClient, config: dict, sessions: Optional[SessionStore] = None
+    ):
         self.github = github
         self.config = config
         self.claude_config = config.get("claude", {})
+        # Per-issue CLI sessions to resume (None: every invocation starts fresh)
+        self.sessions = sessions
+        # Context of the prompt being built for each issue, to record which
+        # comments the session was actually given
+        self._issue_contexts: dict[int, ContextAssembler] = {}
+        # Stats of the most recent streaming run for a task (turns, time,
+        # cost, verdict); calls without a task return theirs only
+        self.last_run: Optional[ClaudeRunStats] = None
 
     def invoke_claude(
         self,
@@ -32,6 +48,9 @@ class BasePersona:
         timeout_minutes: Optional[int] = None,
         max_turns: Optional[int] = None,
         append_system: Optional[str] = None,
+        stop_on_verdict: bool = False,
+        task: Optional[Task] = None,
+        model: Optional[str] = None,
     ) -> tuple[bool, str]:
         """
         Invoke Claude CLI in YOLO mode.
@@ -42,13 +61,21 @@ class BasePersona:
             timeout_minutes: Override timeout
             max_turns: Override max turns
             append_system: Additional system prompt content
+            stop_on_verdict: Stop the session as soon as a final
+                VERDICT:/REVIEW_VERDICT:/QA_VERDICT: line has been written
+                (streaming mode only)
+            task: The task this call is for; when session reuse is on, this
+                persona's previous session for the task in this directory
+                is resumed
+            model: Override the configured default model
 
         Returns:
             Tuple of (success: bool, output: str)
         """
         timeout = (timeout_minutes or self.claude_config.get("timeout_minutes", 30)) * 60
         turns = max_turns or self.claude_config.get("max_turns", 50)
-        model = self.claude_config.get("default_model", "sonnet")
+        model = model or self.claude_config.get("default_model", "sonnet")
+        streaming = self.claude_config.get("stream_output", True)
 
         # Build the full system prompt
         full_system = self.system_prompt
@@ -62,15 +89,115 @@ class BasePersona:
             "--model", model,
             "--max-turns", str(turns),
             "--system-prompt", full_system,
-            "-p", prompt,
         ]
+        if streaming:
+            cmd.extend(STREAM_FLAGS)
 
         cwd = working_dir or os.getcwd()
+        session = (
+            self.sessions.get(task.issue_number, self.persona_name, cwd)
+            if task and self.sessions else None
+        )
+        session_id = None
+        if session:
+            session_id = session["session_id"]
+            cmd.extend(["--resume", session_id])
+        elif task and self.sessions:
+            session_id = str(uuid.uuid4())
+            cmd.extend(["--session-id", session_id])
+        cmd.extend(["-p", prompt])
+
         logger.info(
             f"[{self.persona_name}] Invoking Claude CLI in {cwd} "
-            f"(model={model}, max_turns={turns}, timeout={timeout}s)"
+            f"(model={model}, max_turns={turns}, timeout={timeout}s"
+            + (f", resuming session {session_id}" if session else "")
+            + ")"
+        )
+
+        try:
+            if streaming:
+                success, output, stats = self._run_streaming(
+                    cmd, cwd, timeout, turns, stop_on_verdict,
+                )
+                if task:
+                    self.last_run = stats
+                if stats.session_id:
+                    session_id = stats.session_id
+            else:
+                success, output = self._run_buffered(cmd, cwd, timeout)
+
+            context = self._issue_contexts.pop(task.issue_number, None) if task else None
+            if task and self.sessions:
+                if success:
+                    # Newest comment that made it into the prompt; None keeps
+                    # what the session had seen before
+                    seen = context.rendered_comment_ids if context else ()
+                    self.sessions.record(
+                        task.issue_number, self.persona_name, cwd, session_id,
+                        comment_id=max(seen, default=None),
+                    )
+                elif session:
+                    # Don't keep resuming a session that just failed
+                    self.sessions.forget(task.issue_number, self.persona_name, cwd)
+            return success, output
+
+        except FileNotFoundError:
+            logger.error(f"[{self.persona_name}] Claude CLI not found. Is it installed?")
+            return False, "Claude CLI not found"
+
+        except Exception as e:
+            logger.error(f"[{self.persona_name}] Unexpected error: {e}")
+            return False, str(e)
+
+    def _run_streaming(
+        self, cmd: list[str], cwd: str, timeout: int, turns: int, stop_on_verdict: bool
+    ) -> tuple[bool, str, ClaudeRunStats]:
+        """
+        Run the CLI with stream-json output, following progress live.
+
+        Returns:
+            Tuple of (success, output, stats of this run)
+        """
+        stream = ClaudeStream(
+            cmd,
+            cwd=cwd,
+            timeout_seconds=timeout,
+            max_turns=turns,
+            stop_on_verdict=stop_on_verdict,
+            verdict_grace_seconds=self.claude_config.get("verdict_grace_seconds", 20),
+            max_output_chars=self.claude_config.get("max_output_chars", 200_000),
+            progress_interval_seconds=self.claude_config.get("progress_interval_seconds", 60),
+            label=self.persona_name,
+            env={**os.environ},
+        )
+        returncode, output, stderr = stream.run()
+        stats = stream.stats
+
+        if stats.timed_out:
+            logger.error(
+                f"[{self.persona_name}] Claude CLI timed out after {timeout}s "
+                f"({stats.turns} turn(s))"
+            )
+            return False, f"Claude CLI timed out after {timeout // 60} minutes", stats
+
+        if returncode != 0:
+            logger.error(
+                f"[{self.persona_name}] Claude CLI exited with code {returncode}\n"
+                f"stderr: {stderr[:1000]}"
+            )
+            return False, stderr or "Claude CLI failed with no output", stats
+
+        cost = f", ${stats.cost_usd:.2f}" if stats.cost_usd is not None else ""
+        logger.info(
+            f"[{self.persona_name}] Claude CLI completed successfully "
+            f"({stats.turns} turn(s), {stats.elapsed_seconds:.0f}s{cost}"
+            + (", stopped after verdict" if stats.stopped_early else "")
+            + ")"
         )
+        return True, output, stats
 
+    def _run_buffered(self, cmd: list[str], cwd: str, timeout: int) -> tuple[bool, str]:
+        """Run the CLI with plain text output, collected when it exits."""
         try:
             result = subprocess.run(
                 cmd,
@@ -80,46 +207,92 @@ class BasePersona:
                 timeout=timeout,
                 env={**os.environ},
             )
-
-            output = result.stdout
-            if result.returncode != 0:
-                logger.error(
-                    f"[{self.persona_name}] Claude CLI exited with code {result.returncode}\n"
-                    f"stderr: {result.stderr[:1000]}"
-                )
-                return False, result.stderr or "Claude CLI failed with no output"
-
-            logger.info(f"[{self.persona_name}] Claude CLI completed successfully")
-            return True, output
-
         except subprocess.TimeoutExpired:
             logger.error(f"[{self.persona_name}] Claude CLI timed out after {timeout}s")
             return False, f"Claude CLI timed out after {timeout // 60} minutes"
 
-        except FileNotFoundError:
-            logger.error(f"[{self.persona_name}] Claude CLI not found. Is it installed?")
-            return False, "Claude CLI not found"
+        output = result.stdout
+        if result.returncode != 0:
+            logger.error(
+                f"[{self.persona_name}] Claude CLI exited with code {result.returncode}\n"
+                f"stderr: {result.stderr[:1000]}"
+            )
+            return False, result.stderr or "Claude CLI failed with no output"
 
-        except Exception as e:
-            logger.error(f"[{self.persona_name}] Unexpected error: {e}")
-            return False, str(e)
+        logger.info(f"[{self.persona_name}] Claude CLI completed successfully")
+        return True, output
 
-    def get_issue_context(self, task: Task) -> str:
+    def new_context(self) -> ContextAssembler:
+        """A context assembler sized to the configured prompt budget."""
+        return ContextAssembler(self.claude_config.get("context_budget_tokens", 16000))
+
+    def add_issue_context(
+        self, context: ContextAssembler, heading: str, task: Task,
+        working_dir: Optional[str] = None, resumable: bool = True,
+    ):
         """
-        Build context from all issue comments — this is the shared memory
-        between personas.
+        Add the issue thread to a prompt's context, scored per comment.
+
+        Args:
+            resumable: False for prompts sent without `task` (a fresh
+                session that never resumes): they get the whole thread
+        """
+        comments, resumed = self._context_comments(task, working_dir, resumable)
+        if resumable:
+            self._issue_contexts[task.issue_number] = context
+        context.add_comments(
+            heading, comments,
+            human_username=getattr(self.github, "human_username", ""),
+            preamble=RESUMED_CONTEXT_NOTE if resumed else "",
+        )
+
+    def _context_comments(
+        self, task: Task, working_dir: Optional[str] = None, resumable: bool = True,
+    ) -> tuple[list[dict], bool]:
+        """
+        Comments to give Claude, and whether they're only the ones posted
+        since a resumed session last ran.
         """
         comments = self.github.get_issue_comments(task.issue_number)
         if not comments:
-            return ""
+            return [], False
+        if not resumable:
+            return comments, False
+
+        cwd = working_dir or os.getcwd()
+        session = (
+            self.sessions.get(task.issue_number, self.persona_name, cwd)
+            if self.sessions else None
+        )
+        seen_through = session.get("comment_id") if session else None
+        if seen_through is None:
+            return comments, False
+        return [c for c in comments if c["id"] > seen_through], True
 
-        context_parts = []
-        for c in comments:
-            author = c.get("user", {}).get("login", "unknown")
-            body = c.get("body", "")
-            context_parts.append(f"**{author}:**\n{body}")
+    def get_pr_changes(
+        self, task: Task, worktree_manager=None
+    ) -> tuple[Optional[str], Optional[list[dict]]]:
+        """
+        The PR's diff, computed from the task's worktree when it has one.
+
+        Returns:
+            Tuple of (unified diff, per-file stats). Stats are None when the
+            diff came from the API (fetch them with get_pr_files if needed).
+        """
+        if worktree_manager and task.repo:
+            worktree_path = worktree_manager.worktree_path_for(
+                task.repo, task.branch_name, task.issue_number,
+            )
+            if os.path.isdir(worktree_path):
+                local = worktree_manager.get_branch_diff(
+                    task.repo, worktree_path,
+                    base_branch=self.github.get_default_branch(task.repo),
+                    ignore_whitespace=self.config.get("review", {}).get("ignore_whitespace", False),
+                )
+                if local:
+                    return local
 
-        return "\n\n---\n\n".join(context_parts)
+        return self.github.get_pr_diff(task.repo, task.pr_number), None
 
     def comment(self, task: Task, body: str):
         """Post a comment as this persona."""
@@ -3,10 +3,13 @@ developer.py — Developer persona: implements code using Claude CLI in YOLO mod
 """
 
 import logging
+from typing import Optional
 from .base import BasePersona
 from task_parser import Task
 from worktree_manager import WorktreeManager
 from github_client import GitHubClient
+from claude_sessions import SessionStore
+from context_budget import REQUIRED
 
 logger = logging.getLogger(__name__)
 
@@ -33,8 +36,11 @@ Guidelines:
 
 If you encounter a blocker that prevents completion, clearly describe what's blocking you."""
 
-    def __init__(self, github: GitHubClient, config: dict, worktree_manager: WorktreeManager):
-        super().__init__(github, config)
+    def __init__(
+        self, github: GitHubClient, config: dict, worktree_manager: WorktreeManager,
+        sessions: Optional[SessionStore] = None,
+    ):
+        super().__init__(github, config, sessions)
         self.worktree_manager = worktree_manager
 
     def execute(self, task: Task, worktree_path: str, is_revision: bool = False) -> bool:
@@ -63,6 +69,7 @@ If you encounter a blocker that prevents completion, clearly describe what's blo
         success, output = self.invoke_claude(
             prompt,
             working_dir=worktree_path,
+            task=task,
         )
 
         if not success:
@@ -98,10 +105,6 @@ If you encounter a blocker that prevents completion, clearly describe what's blo
 
     def _build_prompt(self, task: Task, worktree_path: str, is_revision: bool) -> str:
         """Build the implementation prompt."""
-        # Get all conversation history — this includes the architect's plan
-        # and any review feedback
-        issue_context = self.get_issue_context(task)
-
         parts = [f"# {'Revision' if is_revision else 'Implementation'}: {task.title}"]
 
         if is_revision:
@@ -113,14 +116,16 @@ If you encounter a blocker that prevents completion, clearly describe what's blo
 
         parts.append(f"\n## Issue #{task.issue_number}")
 
-        if task.full_prompt:
-            parts.append(f"\n## Original Task\n{task.full_prompt}")
-
-        if issue_context:
-            parts.append(
-                f"\n## Conversation History (includes design plan and review feedback)"
-                f"\n{issue_context[:4000]}"
-            )
+        # Conversation history includes the architect's plan and any review
+        # feedback; the latest feedback is always kept
+        context = self.new_context()
+        context.add("## Original Task", task.full_prompt, priority=REQUIRED)
+        self.add_issue_context(
+            context,
+            "## Conversation History (includes design plan and review feedback)",
+            task, worktree_path,
+        )
+        parts.extend(context.render())
 
         parts.append(
             "\n## Instructions\n"
@@ -134,6 +139,10 @@ If you encounter a blocker that prevents completion, clearly describe what's blo
             "- Handling edge cases"
         )
 
+        sparse_hint = self.worktree_manager.sparse_checkout_hint(worktree_path)
+        if sparse_hint:
+            parts.append(f"\n{sparse_hint}")
+
         return "\n".join(parts)
 
     def _extract_summary(self, output: str, max_length: int = 1500) -> str:
@@ -5,6 +5,7 @@ product_owner.py — Product Owner persona: triages issues and refines requireme
 import logging
 from .base import BasePersona
 from task_parser import Task
+from context_budget import REQUIRED
 
 logger = logging.getLogger(__name__)
 
@@ -57,7 +58,9 @@ Do not write any code. Focus only on requirements clarity."""
         prompt = self._build_prompt(task)
 
         # Invoke Claude
-        success, output = self.invoke_claude(prompt, max_turns=5)
+        success, output = self.invoke_claude(
+            prompt, max_turns=5, stop_on_verdict=True, task=task,
+        )
 
         if not success:
             self.fail(task, f"Product Owner triage failed:\n```\n{output[:500]}\n```")
@@ -95,19 +98,13 @@ Do not write any code. Focus only on requirements clarity."""
             f"**Priority:** {task.priority}",
         ]
 
-        if task.task_description:
-            parts.append(f"\n## Task Description\n{task.task_description}")
-
-        if task.context:
-            parts.append(f"\n## Context\n{task.context}")
-
-        if task.acceptance_criteria:
-            parts.append(f"\n## Acceptance Criteria\n{task.acceptance_criteria}")
-
+        context = self.new_context()
+        context.add("## Task Description", task.task_description, priority=REQUIRED)
+        context.add("## Context", task.context, priority=REQUIRED)
+        context.add("## Acceptance Criteria", task.acceptance_criteria, priority=REQUIRED)
         # Include any existing conversation
-        issue_context = self.get_issue_context(task)
-        if issue_context:
-            parts.append(f"\n## Previous Discussion\n{issue_context}")
+        self.add_issue_context(context, "## Previous Discussion", task)
+        parts.extend(context.render())
 
         parts.append(
             "\n## Your Task\n"
@@ -3,10 +3,15 @@ qa.py — QA persona: validates work against acceptance criteria and merges PRs.
 """
 
 import logging
+from typing import Optional
 from .base import BasePersona
 from task_parser import Task
 from worktree_manager import WorktreeManager
 from github_client import GitHubClient
+from context_budget import REQUIRED
+from suite_runner import SuiteRunner, SuiteResult, format_results
+from suite_impact import impacted_suite
+from suite_cache import SuiteResultCache
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +44,13 @@ Be specific. Reference file names and line numbers where possible."""
     def __init__(self, github: GitHubClient, config: dict, worktree_manager: WorktreeManager):
         super().__init__(github, config)
         self.worktree_manager = worktree_manager
+        # Structured results of the most recent test run
+        self.last_test_results: list[SuiteResult] = []
+        tests_config = config.get("qa", {}).get("tests", {})
+        self.test_cache = (
+            SuiteResultCache(max_entries=tests_config.get("cache_max_entries", 500))
+            if tests_config.get("cache", True) else None
+        )
 
     def execute(self, task: Task, worktree_path: str) -> str:
         """
@@ -60,21 +72,27 @@ Be specific. Reference file names and line numbers where possible."""
             f"#{task.issue_number}: {task.title}"
         )
 
-        # Run tests first if they exist
-        test_results = self._run_tests(worktree_path)
-
-        # Get PR diff and files
-        diff = self.github.get_pr_diff(task.repo, task.pr_number)
-        pr_files = self.github.get_pr_files(task.repo, task.pr_number)
+        # Get PR diff and files (locally from the worktree when possible)
+        diff, pr_files = self.get_pr_changes(task, self.worktree_manager)
+        if diff and pr_files is None:
+            pr_files = self.github.get_pr_files(task.repo, task.pr_number)
 
         if not diff:
             self.fail(task, "Could not retrieve PR diff for QA.")
             return "failed"
 
+        # Run the tests the change affects (then the rest, if configured)
+        changed_files = []
+        for f in pr_files or []:
+            changed_files.append(f["filename"])
+            if f.get("previous_filename"):
+                changed_files.append(f["previous_filename"])
+        test_results = self._run_tests(worktree_path, task, changed_files)
+
         # Build prompt and invoke Claude
         prompt = self._build_prompt(task, diff, pr_files, test_results)
         success, output = self.invoke_claude(
-            prompt, working_dir=worktree_path, max_turns=10,
+            prompt, working_dir=worktree_path, max_turns=10, stop_on_verdict=True,
         )
 
         if not success:
@@ -160,86 +178,83 @@ Be specific. Reference file names and line numbers where possible."""
         logger.info(f"[QA] Merged and closed #{task.issue_number}")
         return True
 
-    def _run_tests(self, worktree_path: str) -> str:
-        """Attempt to run tests in the worktree. Returns results summary."""
-        import subprocess
-        import os
-
-        results = []
-
-        # Detect and run test frameworks
-        test_commands = []
-
-        if os.path.exists(os.path.join(worktree_path, "package.json")):
-            test_commands.append(("npm test", ["npm", "test", "--", "--passWithNoTests"]))
-        if os.path.exists(os.path.join(worktree_path, "pytest.ini")) or \
-           os.path.exists(os.path.join(worktree_path, "pyproject.toml")) or \
-           os.path.exists(os.path.join(worktree_path, "setup.py")):
-            test_commands.append(("pytest", ["python", "-m", "pytest", "-v", "--tb=short"]))
-        if os.path.exists(os.path.join(worktree_path, "Cargo.toml")):
-            test_commands.append(("cargo test", ["cargo", "test"]))
-        if os.path.exists(os.path.join(worktree_path, "go.mod")):
-            test_commands.append(("go test", ["go", "test", "./..."]))
-
-        if not test_commands:
-            return "No test framework detected."
-
-        for name, cmd in test_commands:
-            try:
-                result = subprocess.run(
-                    cmd, cwd=worktree_path,
-                    capture_output=True, text=True, timeout=300,
-                )
-                status = "✅ PASSED" if result.returncode == 0 else "❌ FAILED"
-                output = result.stdout[-500:] if result.stdout else ""
-                error = result.stderr[-500:] if result.stderr else ""
-                results.append(
-                    f"**{name}**: {status}\n"
-                    f"```\n{output}\n{error}\n```"
-                )
-            except subprocess.TimeoutExpired:
-                results.append(f"**{name}**: ⏰ Timed out after 5 minutes")
-            except FileNotFoundError:
-                results.append(f"**{name}**: ⚠️ Command not found")
-            except Exception as e:
-                results.append(f"**{name}**: ⚠️ Error: {e}")
+    def _run_tests(
+        self, worktree_path: str, task: Task, changed_files: Optional[list[str]] = None,
+    ) -> str:
+        """
+        Run the worktree's test suites concurrently. Suites already run on
+        an identical tree are answered from the result cache.
+
+        With impact selection on, each suite is first narrowed to the tests
+        the changed files can affect. A failure there is the verdict; if
+        they pass, the full suites follow according to `full_suite`:
+        "after_pass" (always), "recurring" (only for recurring tasks, e.g.
+        a nightly job) or "never".
+
+        Args:
+            worktree_path: Worktree to test
+            task: The task under QA
+            changed_files: Paths the PR touches (enables impact selection)
 
-        return "\n\n".join(results)
+        Returns:
+            Results summary
+        """
+        tests_config = self.config.get("qa", {}).get("tests", {})
+        impact_config = tests_config.get("impact", {})
+        runner = SuiteRunner(tests_config)
+        suites = runner.detect(worktree_path)
+        tree_sha = None
+        if suites and self.test_cache is not None:
+            tree_sha = self.worktree_manager.working_tree_sha(worktree_path)
+
+        def run(batch: list) -> list[SuiteResult]:
+            return runner.run(batch, cache=self.test_cache, repo=task.repo, tree_sha=tree_sha)
+
+        narrowed = [None] * len(suites)
+        if changed_files and impact_config.get("enabled", True):
+            narrowed = [impacted_suite(s, changed_files) for s in suites]
+
+        if not any(narrowed):
+            results = run(suites)
+        else:
+            results = run([n or s for s, n in zip(suites, narrowed)])
+            full_suite = impact_config.get("full_suite", "after_pass")
+            follow_up = all(r.ok for r in results) and (
+                full_suite == "after_pass"
+                or (full_suite == "recurring" and task.schedule != "once")
+            )
+            if follow_up:
+                logger.info("[QA] Impacted tests passed; running the full suites")
+                results += run([s for s, n in zip(suites, narrowed) if n])
+            else:
+                logger.info("[QA] Verdict from impacted tests only; full suites skipped")
+
+        self.last_test_results = results
+        return format_results(results)
 
     def _build_prompt(
         self, task: Task, diff: str,
         pr_files: list[dict], test_results: str
     ) -> str:
         """Build the QA validation prompt."""
-        max_diff = 10000
-        truncated_diff = diff[:max_diff]
-        if len(diff) > max_diff:
-            truncated_diff += f"\n\n... ({len(diff) - max_diff} chars omitted)"
-
         # Summarise changed files
         file_summary = "\n".join(
             f"- `{f['filename']}` (+{f.get('additions', 0)}/-{f.get('deletions', 0)})"
             for f in pr_files[:30]
         )
 
-        issue_context = self.get_issue_context(task)
-
         parts = [
             f"# QA Validation: {task.title}",
             f"\n## Issue #{task.issue_number} — PR #{task.pr_number}",
         ]
 
-        if task.acceptance_criteria:
-            parts.append(f"\n## Acceptance Criteria\n{task.acceptance_criteria}")
-
-        if issue_context:
-            parts.append(f"\n## Discussion & History\n{issue_context[:2000]}")
-
-        if test_results:
-            parts.append(f"\n## Test Results\n{test_results}")
-
-        parts.append(f"\n## Files Changed\n{file_summary}")
-        parts.append(f"\n## Diff\n```diff\n{truncated_diff}\n```")
+        context = self.new_context()
+        context.add("## Acceptance Criteria", task.acceptance_criteria, priority=REQUIRED)
+        self.add_issue_context(context, "## Discussion & History", task)
+        context.add("## Test Results", test_results, priority=REQUIRED)
+        context.add("## Files Changed", file_summary, priority=REQUIRED)
+        context.add_diff("## Diff", diff)
+        parts.extend(context.render())
 
         parts.append(
             "\n## Your Task\n"
@@ -0,0 +1,175 @@
+"""
+rate_limiter.py — Track the GitHub API budget, pace requests and compute backoff.
+"""
+
+import random
+import threading
+import time
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Methods that are safe to repeat after a transient failure
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Statuses worth retrying for idempotent requests
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+
+class RateLimiter:
+    """
+    Keeps track of the remaining GitHub API budget from response headers.
+
+    Reads X-RateLimit-Limit / -Remaining / -Reset and Retry-After, and spreads
+    the remaining requests over the time left in the window once the budget
+    drops below `reserve`, so we slow down before hitting the wall instead
+    of after. Thread-safe — one limiter is shared by all workers.
+    """
+
+    def __init__(
+        self,
+        reserve: int = 100,
+        max_wait_seconds: int = 900,
+        low_watermark: float = 0.2,
+    ):
+        """
+        Args:
+            reserve: Start pacing once fewer than this many requests remain
+            max_wait_seconds: Never block a single request longer than this
+            low_watermark: Budget fraction below which the poll interval stretches
+        """
+        self.reserve = reserve
+        self.max_wait_seconds = max_wait_seconds
+        self.low_watermark = low_watermark
+
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.blocked_until: float = 0.0
+        self._last_request_at: float = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, headers) -> None:
+        """Record the budget reported by a response's headers."""
+        with self._lock:
+            limit = _int_header(headers, "X-RateLimit-Limit")
+            remaining = _int_header(headers, "X-RateLimit-Remaining")
+            reset = _int_header(headers, "X-RateLimit-Reset")
+            if limit is not None:
+                self.limit = limit
+            if remaining is not None:
+                self.remaining = remaining
+            if reset is not None:
+                self.reset_at = float(reset)
+
+    def block_for(self, seconds: float) -> None:
+        """Stop sending requests for `seconds` (e.g. from Retry-After)."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.time() + seconds)
+        logger.warning(f"GitHub asked us to back off for {seconds:.0f}s")
+
+    def wait_time(self) -> float:
+        """Seconds to wait before the next request may be sent."""
+        with self._lock:
+            return self._wait_time_locked(time.time())
+
+    def acquire(self) -> bool:
+        """
+        Block until a request may be sent.
+
+        Returns:
+            False if the required wait exceeds max_wait_seconds (the caller
+            should give up rather than stall a worker for that long).
+        """
+        with self._lock:
+            now = time.time()
+            wait = self._wait_time_locked(now)
+            if wait > self.max_wait_seconds:
+                return False
+            # Reserve our slot now so concurrent callers space themselves out
+            self._last_request_at = now + wait
+
+        if wait > 0:
+            if wait >= 1:
+                logger.info(f"Pacing GitHub API requests: waiting {wait:.1f}s")
+            time.sleep(wait)
+        return True
+
+    def budget(self) -> dict:
+        """Current view of the API budget."""
+        with self._lock:
+            now = time.time()
+            return {
+                "limit": self.limit,
+                "remaining": self.remaining,
+                "reset_in": max(0, int(self.reset_at - now)) if self.reset_at else None,
+                "blocked_for": max(0, int(self.blocked_until - now)),
+            }
+
+    def stretch_interval(self, base_seconds: int) -> int:
+        """
+        Poll interval adjusted for the remaining budget.
+
+        Returns base_seconds while the budget is healthy, and progressively
+        longer intervals (capped at the window reset) as it runs low.
+        """
+        with self._lock:
+            now = time.time()
+            interval = float(base_seconds)
+
+            if self.blocked_until > now:
+                interval = max(interval, self.blocked_until - now)
+
+            if self.limit and self.remaining is not None:
+                fraction = self.remaining / self.limit
+                if fraction < self.low_watermark:
+                    stretched = base_seconds * (self.low_watermark / max(fraction, 0.01))
+                    if self.reset_at and self.reset_at > now:
+                        stretched = min(stretched, self.reset_at - now)
+                    interval = max(interval, stretched)
+
+            return int(interval)
+
+    # ─── Internal ───────────────────────────────────────────────────────
+
+    def _wait_time_locked(self, now: float) -> float:
+        """Caller must hold the lock."""
+        wait = max(0.0, self.blocked_until - now)
+
+        if self.remaining is not None and self.reset_at and self.reset_at > now:
+            if self.remaining <= 0:
+                # Window exhausted — wait for the reset (plus a little slack)
+                wait = max(wait, self.reset_at - now + 1)
+            elif self.remaining < self.reserve:
+                # Spread what's left evenly over the rest of the window
+                spacing = (self.reset_at - now) / self.remaining
+                wait = max(wait, self._last_request_at + spacing - now)
+
+        return max(0.0, wait)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter for retry number `attempt` (0-based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Parse a Retry-After header given in seconds."""
+    value = headers.get("Retry-After") if headers else None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _int_header(headers, name: str) -> Optional[int]:
+    value = headers.get(name) if headers else None
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
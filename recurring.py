@@ -5,6 +5,7 @@ recurring.py — Track and evaluate recurring task schedules.
 import json
 import os
 import logging
+import threading
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -14,11 +15,12 @@ DEFAULT_DATA_DIR = os.environ.get("DATA_DIR", "/data")
 
 
 class RecurringTracker:
-    """Tracks last-run times for recurring tasks."""
+    """Tracks last-run times for recurring tasks. Safe to share between workers."""
 
     def __init__(self, data_dir: str = DEFAULT_DATA_DIR):
         self.data_file = os.path.join(data_dir, "recurring.json")
         os.makedirs(data_dir, exist_ok=True)
+        self._lock = threading.Lock()
         self._load()
 
     def is_due(self, issue_number: int, schedule: str) -> bool:
@@ -33,10 +35,12 @@ class RecurringTracker:
             True if the task should run
         """
         key = str(issue_number)
-        if key not in self.data:
+        with self._lock:
+            entry = dict(self.data.get(key, {}))
+        if not entry:
             return True
 
-        last_run_str = self.data[key].get("last_run")
+        last_run_str = entry.get("last_run")
         if not last_run_str:
             return True
 
@@ -58,11 +62,12 @@ class RecurringTracker:
     def record_run(self, issue_number: int, schedule: str):
         """Record that a recurring task was run."""
         key = str(issue_number)
-        self.data[key] = {
-            "schedule": schedule,
-            "last_run": datetime.utcnow().isoformat(),
-        }
-        self._save()
+        with self._lock:
+            self.data[key] = {
+                "schedule": schedule,
+                "last_run": datetime.utcnow().isoformat(),
+            }
+            self._save()
         logger.info(f"Recorded run for recurring task #{issue_number}")
 
     def _load(self):
@@ -78,9 +83,11 @@ class RecurringTracker:
             self.data = {}
 
     def _save(self):
-        """Persist recurring data to disk."""
+        """Persist recurring data to disk (atomically, via a temp file)."""
+        tmp_file = f"{self.data_file}.tmp"
         try:
-            with open(self.data_file, "w") as f:
+            with open(tmp_file, "w") as f:
                 json.dump(self.data, f, indent=2)
+            os.replace(tmp_file, self.data_file)
         except IOError as e:
             logger.error(f"Failed to save recurring data: {e}")
@@ -0,0 +1,198 @@
+"""
+response_cache.py — Conditional-request cache for GitHub API responses.
+
+Stores the body of GET responses together with their ETag / Last-Modified
+validators so repeat requests can be sent with If-None-Match and a
+304 Not Modified (which GitHub does not count against the rate limit)
+can be answered from the cache.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = os.environ.get("DATA_DIR", "/data")
+
+
+class ResponseCache:
+    """Bounded in-memory LRU of validated responses, optionally backed by disk."""
+
+    def __init__(
+        self,
+        max_entries: int = 500,
+        persist: bool = False,
+        data_dir: str = DEFAULT_DATA_DIR,
+        max_disk_entries: int = 2000,
+    ):
+        """
+        Args:
+            max_entries: Maximum number of responses kept in memory
+            persist: Also store entries under data_dir so they survive restarts
+            data_dir: Base directory for the on-disk store
+            max_disk_entries: Maximum number of responses kept on disk
+        """
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.cache_dir = os.path.join(data_dir, "http_cache") if persist else None
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(method: str, url: str, params: Optional[dict] = None) -> str:
+        """Build a cache key from method, URL and (order-independent) params."""
+        items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        query = "&".join(f"{k}={v}" for k, v in items)
+        return f"{method.upper()} {url}?{query}"
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Look up a cached entry.
+
+        Returns:
+            Dict with "etag", "last_modified" and "body", or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = self._read_disk(key)
+        if entry is not None:
+            with self._lock:
+                self._remember(key, entry)
+        return entry
+
+    def conditional_headers(self, key: str) -> dict:
+        """Headers to send so the server can answer 304 if nothing changed."""
+        entry = self.get(key)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(
+        self, key: str, etag: Optional[str], last_modified: Optional[str], body,
+        links: Optional[dict] = None,
+    ):
+        """
+        Store a response body with its validators. No-op without validators.
+
+        Args:
+            links: Pagination relations from the Link header ({rel: url}),
+                kept so a 304 on a paginated list can still be followed
+        """
+        if not etag and not last_modified:
+            return
+        entry = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": copy.deepcopy(body),
+            "links": dict(links or {}),
+        }
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def not_modified(self, key: str) -> Optional[dict]:
+        """
+        Return a copy of the cached entry ("body", "links", ...) after a
+        304 response. Callers get their own copy so they can't mutate the cache.
+        """
+        entry = self.get(key)
+        with self._lock:
+            self.hits += 1
+        return copy.deepcopy(entry) if entry else None
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def clear(self):
+        """Drop every cached entry, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    # ─── Internal ───────────────────────────────────────────────────────
+
+    def _remember(self, key: str, entry: dict):
+        """Insert into the in-memory LRU. Caller must hold the lock."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _read_disk(self, key: str) -> Optional[dict]:
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("key") != key:
+                return None
+            # Touch so disk eviction is by last use
+            os.utime(path, None)
+            return data.get("entry")
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Failed to read cached response: {e}")
+            return None
+
+    def _write_disk(self, key: str, entry: dict):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.tmp.{threading.get_ident()}"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"key": key, "entry": entry}, f)
+            os.replace(tmp_path, path)
+        except IOError as e:
+            logger.warning(f"Failed to persist cached response: {e}")
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """Remove the least recently used files once over the disk budget."""
+        try:
+            names = [n for n in os.listdir(self.cache_dir) if n.endswith(".json")]
+        except OSError:
+            return
+        excess = len(names) - self.max_disk_entries
+        if excess <= 0:
+            return
+        paths = [os.path.join(self.cache_dir, n) for n in names]
+        paths.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+        for path in paths[:excess]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,198 @@
+"""
+scheduler.py — Dependency graph over open task issues.
+
+Tasks declare `depends_on` (issue numbers that must be done first) and an
+optional `group`. The graph over every open `claude` issue decides:
+
+- which tasks are released: all dependencies are done (labelled `done`
+  or closed); tasks in a dependency cycle are never released
+- which go first: a task inherits the highest priority of anything
+  waiting on it, and among equals the one heading the longest chain of
+  blocked work runs first
+- what can run together: independent tasks run in parallel, but two
+  tasks of the same group never run at the same time
+
+The graph is updated incrementally — only issues whose `updated_at`
+changed are re-parsed.
+"""
+
+import time
+import logging
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from task_parser import Task, TaskSpec, parse_issue_view, PRIORITY_ORDER
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Node:
+    number: int
+    updated_at: str
+    priority: str
+    group: Optional[str]
+    depends_on: tuple[int, ...]
+    done: bool
+
+
+class TaskGraph:
+    """Incrementally maintained dependency DAG of open task issues."""
+
+    def __init__(
+        self, fetch_issue: Callable[[int], Optional[dict]],
+        recheck_seconds: float = 300,
+    ):
+        """
+        Args:
+            fetch_issue: Looks up an issue by number (e.g. GitHubClient.get_issue),
+                for dependencies that aren't open task issues
+            recheck_seconds: How long to trust that such a dependency is still open
+        """
+        self.fetch_issue = fetch_issue
+        self.recheck_seconds = recheck_seconds
+        self._nodes: dict[int, _Node] = {}
+        # Dependencies outside the graph: number -> (resolved, checked_at)
+        self._external: dict[int, tuple[bool, float]] = {}
+        self._rank: dict[int, tuple[int, int]] = {}
+        self._cyclic: set[int] = set()
+
+    def update(self, issues: list[dict]):
+        """
+        Sync the graph with the current open task issues.
+
+        Args:
+            issues: Every open `claude` issue, whatever its stage
+        """
+        seen = set()
+        changed = False
+        for issue in issues:
+            number = issue["number"]
+            seen.add(number)
+            node = self._nodes.get(number)
+            updated_at = issue.get("updated_at", "")
+            if node and node.updated_at == updated_at and updated_at:
+                continue
+            self._nodes[number] = self._node_for(issue, parse_issue_view(issue))
+            self._external.pop(number, None)
+            changed = True
+
+        for number in set(self._nodes) - seen:
+            # Closed (or no longer a task); resolved on next lookup
+            del self._nodes[number]
+            changed = True
+
+        if changed:
+            self._recompute()
+
+    def blocked_by(self, task: Task) -> list[int]:
+        """
+        Dependencies of a task that aren't done yet (itself, if in a cycle).
+
+        Args:
+            task: A Task, or anything with issue_number/depends_on (e.g. a
+                ready-queue entry)
+        """
+        if task.issue_number in self._cyclic:
+            return [task.issue_number]
+        return [d for d in _depends_on(task) if not self._resolved(d)]
+
+    def rank(self, task: Task) -> tuple[int, int]:
+        """
+        Sort key: (effective priority, -length of the chain this task heads).
+        Lower sorts first.
+        """
+        return self._rank.get(
+            task.issue_number, (PRIORITY_ORDER.get(task.priority, 1), -1),
+        )
+
+    def group_of(self, issue_number: int) -> Optional[str]:
+        node = self._nodes.get(issue_number)
+        return node.group if node else None
+
+    # ─── Internal ───────────────────────────────────────────────────────
+
+    @staticmethod
+    def _node_for(issue: dict, task: TaskSpec) -> _Node:
+        labels = {l["name"] for l in issue.get("labels", [])}
+        return _Node(
+            number=task.issue_number,
+            updated_at=issue.get("updated_at", ""),
+            priority=task.priority,
+            group=task.group,
+            depends_on=tuple(_depends_on(task)),
+            done="done" in labels,
+        )
+
+    def _resolved(self, number: int) -> bool:
+        node = self._nodes.get(number)
+        if node:
+            return node.done
+
+        resolved, checked_at = self._external.get(number, (False, 0.0))
+        if resolved or time.monotonic() - checked_at < self.recheck_seconds:
+            return resolved
+
+        issue = self.fetch_issue(number)
+        if issue is None:
+            logger.warning(f"Dependency #{number} not found; dependents stay blocked")
+            resolved = False
+        else:
+            labels = {l["name"] for l in issue.get("labels", [])}
+            resolved = issue.get("state") == "closed" or "done" in labels
+        self._external[number] = (resolved, time.monotonic())
+        return resolved
+
+    def _recompute(self):
+        """Find cycles and recompute each node's rank."""
+        dependents: dict[int, list[int]] = {}
+        for node in self._nodes.values():
+            for dep in node.depends_on:
+                dependents.setdefault(dep, []).append(node.number)
+
+        # Iterative DFS over "is depended on by" edges, post-order
+        chain: dict[int, int] = {}
+        priority: dict[int, int] = {}
+        cyclic: set[int] = set()
+        state: dict[int, int] = {}  # 1 = on stack, 2 = finished
+        for root in self._nodes:
+            if root in state:
+                continue
+            stack = [(root, iter(dependents.get(root, ())))]
+            state[root] = 1
+            while stack:
+                number, children = stack[-1]
+                child = next(children, None)
+                if child is not None:
+                    if state.get(child) == 1:
+                        # Back edge: everything on the stack from child is a cycle
+                        on_stack = [n for n, _ in stack]
+                        cyclic.update(on_stack[on_stack.index(child):])
+                    elif child not in state:
+                        state[child] = 1
+                        stack.append((child, iter(dependents.get(child, ()))))
+                    continue
+                stack.pop()
+                state[number] = 2
+                node = self._nodes[number]
+                below = [c for c in dependents.get(number, ()) if c in chain]
+                chain[number] = 1 + max((chain[c] for c in below), default=0)
+                priority[number] = min(
+                    [PRIORITY_ORDER.get(node.priority, 1)] + [priority[c] for c in below]
+                )
+
+        for number in cyclic - self._cyclic:
+            logger.warning(f"#{number} is part of a dependency cycle; it won't be scheduled")
+        self._cyclic = cyclic
+        self._rank = {n: (priority[n], -chain[n]) for n in self._nodes}
+
+
+def _depends_on(task: Task) -> list[int]:
+    """A task's dependencies as issue numbers ("#12" and "12" both accepted)."""
+    numbers = []
+    for dep in task.depends_on or []:
+        try:
+            numbers.append(int(str(dep).lstrip("#")))
+        except ValueError:
+            logger.warning(f"#{task.issue_number}: ignoring invalid depends_on entry {dep!r}")
+    return numbers
@@ -0,0 +1,110 @@
+"""
+suite_cache.py — Persistent cache of test suite results keyed by tree hash.
+
+A suite's result only depends on the files it runs against and the
+command, so results are stored under (repo, working tree SHA, command).
+Re-running QA on an unchanged tree — a revision that changed nothing, or
+a retry after a prompt failure — returns the stored results instantly,
+and any change to the tree yields a new key.
+"""
+
+import hashlib
+import json
+import os
+import logging
+import threading
+from datetime import datetime
+from typing import Optional
+
+from suite_runner import SuiteResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = os.environ.get("DATA_DIR", "/data")
+
+# Only outcomes that a rerun on the same tree would reproduce
+CACHEABLE_STATUSES = {"passed", "failed"}
+
+
+class SuiteResultCache:
+    """On-disk store of suite results, evicted least-recently-used first."""
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR, max_entries: int = 500):
+        """
+        Args:
+            data_dir: Base directory; results live in data_dir/test_results
+            max_entries: Maximum number of cached suite results
+        """
+        self.cache_dir = os.path.join(data_dir, "test_results")
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(repo: str, tree_sha: str, command: str) -> str:
+        return f"{repo}@{tree_sha}:{command}"
+
+    def get(self, key: str) -> Optional[SuiteResult]:
+        """Look up a cached result."""
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Failed to read cached test result: {e}")
+            return None
+        if data.get("key") != key:
+            return None
+        try:
+            # Touch so eviction is by last use
+            os.utime(path, None)
+        except OSError:
+            pass
+        result = SuiteResult.from_dict(data["result"])
+        result.cached = True
+        return result
+
+    def store(self, key: str, result: SuiteResult):
+        """Store a result if it's one a rerun would reproduce."""
+        if result.status not in CACHEABLE_STATUSES:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.tmp.{threading.get_ident()}"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({
+                    "key": key,
+                    "stored_at": datetime.utcnow().isoformat(),
+                    "result": result.to_dict(),
+                }, f)
+            os.replace(tmp_path, path)
+        except IOError as e:
+            logger.warning(f"Failed to cache test result: {e}")
+            return
+        self._evict()
+
+    # ─── Internal ───────────────────────────────────────────────────────
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _evict(self):
+        """Remove the least recently used results once over max_entries."""
+        with self._lock:
+            try:
+                names = [n for n in os.listdir(self.cache_dir) if n.endswith(".json")]
+            except OSError:
+                return
+            excess = len(names) - self.max_entries
+            if excess <= 0:
+                return
+            paths = [os.path.join(self.cache_dir, n) for n in names]
+            paths.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+            for path in paths[:excess]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,265 @@
+"""
+suite_impact.py — Narrow test suites to the tests a change can affect.
+
+Maps the files a PR changes to the tests that exercise them:
+
+- Python: the reverse import graph of the repo's modules — test files
+  that import a changed module, directly or transitively.
+- Go: the changed packages plus every package that imports them.
+- npm: the workspace packages containing the changes, or jest's own
+  --findRelatedTests when the repo isn't a workspace.
+
+Anything that can't be mapped (a changed config file, a language we don't
+model) means the full suite runs — selection only ever narrows when it's
+sure.
+"""
+
+import ast
+import glob
+import json
+import os
+import re
+import logging
+from typing import Optional
+
+from suite_runner import Suite
+
+logger = logging.getLogger(__name__)
+
+# Directories never scanned for sources
+SKIP_DIRS = {
+    ".git", "node_modules", ".venv", "venv", "__pycache__", ".tox",
+    "dist", "build", "target", "vendor",
+}
+
+# Beyond this many selected targets, just run the full suite
+MAX_TARGETS = 200
+
+
+def impacted_suite(suite: Suite, changed_files: list[str]) -> Optional[Suite]:
+    """
+    A copy of `suite` narrowed to the tests affected by `changed_files`.
+
+    Returns:
+        The narrowed suite (its cmd is empty if no tests are affected), or
+        None if the change can't be mapped and the full suite should run
+    """
+    selector = _SELECTORS.get(suite.kind)
+    if not selector or not changed_files:
+        return None
+    try:
+        return selector(suite, changed_files)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Test impact analysis failed for {suite.name}: {e}")
+        return None
+
+
+# ─── Python ─────────────────────────────────────────────────────────────
+
+def _select_pytest(suite: Suite, changed: list[str]) -> Optional[Suite]:
+    if any(not path.endswith(".py") for path in changed):
+        return None
+
+    root = suite.cwd
+    if any(not os.path.exists(os.path.join(root, p)) for p in changed):
+        # A deleted module breaks importers the graph can no longer see
+        return None
+    modules = _python_modules(root)
+    by_name = {name: path for path, names in modules.items() for name in names}
+    importers: dict[str, set[str]] = {}
+    for path in modules:
+        for imported in _python_imports(root, path, by_name):
+            importers.setdefault(imported, set()).add(path)
+
+    affected = set()
+    pending = list(changed)
+    while pending:
+        path = pending.pop()
+        if path in affected:
+            continue
+        affected.add(path)
+        pending.extend(importers.get(path, ()))
+
+    if any(os.path.basename(p) == "conftest.py" for p in affected):
+        # Fixtures and hooks apply to every test below them without an import
+        return None
+
+    tests = sorted(p for p in affected if _is_python_test(p))
+    return _narrowed(suite, "pytest", suite.cmd + tests, tests)
+
+
+def _python_modules(root: str) -> dict[str, list[str]]:
+    """Repo-relative .py paths → the dotted module names they can be imported as."""
+    modules = {}
+    for path in _walk(root, (".py",)):
+        parts = path[:-3].split("/")
+        if parts[-1] == "__init__":
+            parts = parts[:-1]
+        names = [".".join(parts)] if parts else []
+        # src/ layout: src/pkg/mod.py is imported as pkg.mod
+        if len(parts) > 1 and parts[0] in ("src", "lib"):
+            names.append(".".join(parts[1:]))
+        modules[path] = names
+    return modules
+
+
+def _python_imports(root: str, path: str, by_name: dict[str, str]) -> set[str]:
+    """Repo files that `path` imports (by_name maps dotted module names to paths)."""
+    try:
+        with open(os.path.join(root, path), "r", encoding="utf-8", errors="replace") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (SyntaxError, ValueError):
+        return set()
+
+    package = path[:-3].split("/")[:-1]
+    found = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                prefix = package[: len(package) - (node.level - 1)] if node.level > 1 else package
+                base = ".".join(prefix + ([base] if base else []))
+            names = [base] + [f"{base}.{alias.name}" for alias in node.names]
+        else:
+            continue
+        for name in names:
+            # `import a.b.c` depends on a.b.c, a.b and a (their __init__s)
+            while name:
+                if name in by_name:
+                    found.add(by_name[name])
+                name = name.rpartition(".")[0]
+    found.discard(path)
+    return found
+
+
+def _is_python_test(path: str) -> bool:
+    name = os.path.basename(path)
+    if name == "conftest.py":
+        return False
+    return name.startswith("test_") or name.endswith("_test.py") or "/tests/" in f"/{path}"
+
+
+# ─── Go ─────────────────────────────────────────────────────────────────
+
+_GO_IMPORT = re.compile(r'^\s*(?:import\s+)?(?:[\w.]+\s+)?"([^"]+)"', re.MULTILINE)
+
+
+def _select_go(suite: Suite, changed: list[str]) -> Optional[Suite]:
+    # go.mod/go.sum or non-Go files can affect any package
+    if any(not p.endswith(".go") for p in changed):
+        return None
+
+    root = suite.cwd
+    try:
+        with open(os.path.join(root, "go.mod"), "r") as f:
+            module = re.search(r"^module\s+(\S+)", f.read(), re.MULTILINE).group(1)
+    except (OSError, AttributeError):
+        return None
+
+    # package dir → dirs of packages importing it
+    importers: dict[str, set[str]] = {}
+    for path in _walk(root, (".go",)):
+        pkg_dir = os.path.dirname(path)
+        with open(os.path.join(root, path), "r", encoding="utf-8", errors="replace") as f:
+            source = f.read()
+        for imported in _GO_IMPORT.findall(_go_import_section(source)):
+            if imported == module or imported.startswith(f"{module}/"):
+                imported_dir = imported[len(module):].lstrip("/")
+                importers.setdefault(imported_dir, set()).add(pkg_dir)
+
+    affected = set()
+    pending = [os.path.dirname(p) for p in changed]
+    if any(not os.path.isdir(os.path.join(root, d)) for d in pending):
+        return None
+    while pending:
+        pkg_dir = pending.pop()
+        if pkg_dir in affected:
+            continue
+        affected.add(pkg_dir)
+        pending.extend(importers.get(pkg_dir, ()))
+
+    packages = sorted(f"./{d}" if d else "." for d in affected)
+    cmd = [arg for arg in suite.cmd if arg != "./..."] + packages
+    return _narrowed(suite, "go", cmd, packages)
+
+
+def _go_import_section(source: str) -> str:
+    """The import declarations of a Go file (everything before the first func/type/var)."""
+    match = re.search(r"^(func|type|var|const)\b", source, re.MULTILINE)
+    return source[: match.start()] if match else source
+
+
+# ─── npm ────────────────────────────────────────────────────────────────
+
+def _select_npm(suite: Suite, changed: list[str]) -> Optional[Suite]:
+    root = suite.cwd
+    with open(os.path.join(root, "package.json"), "r") as f:
+        package = json.load(f)
+
+    if any(os.path.basename(p) in ("package.json", "package-lock.json", "yarn.lock",
+                                   "pnpm-lock.yaml") for p in changed):
+        return None
+
+    workspaces = package.get("workspaces") or []
+    if isinstance(workspaces, dict):
+        workspaces = workspaces.get("packages", [])
+
+    if workspaces:
+        dirs = set()
+        for pattern in workspaces:
+            for match in glob.glob(os.path.join(root, pattern)):
+                if os.path.exists(os.path.join(match, "package.json")):
+                    dirs.add(os.path.relpath(match, root).replace(os.sep, "/"))
+        touched = set()
+        for path in changed:
+            owner = next((d for d in dirs if path.startswith(f"{d}/")), None)
+            if owner is None:
+                # Change outside every workspace (shared config, root code)
+                return None
+            touched.add(owner)
+        targets = sorted(touched)
+        cmd = ["npm", "test", *(f"--workspace={d}" for d in targets), "--if-present",
+               "--", "--passWithNoTests"]
+        return _narrowed(suite, "npm", cmd, targets)
+
+    if "jest" in str(package.get("scripts", {}).get("test", "")):
+        sources = [p for p in changed if re.search(r"\.(m?[jt]sx?|cjs)$", p)]
+        if len(sources) != len(changed):
+            return None
+        return _narrowed(suite, "npm", suite.cmd + ["--findRelatedTests", *sources], sources)
+
+    return None
+
+
+_SELECTORS = {
+    "pytest": _select_pytest,
+    "go": _select_go,
+    "npm": _select_npm,
+}
+
+
+# ─── Helpers ────────────────────────────────────────────────────────────
+
+def _narrowed(suite: Suite, kind: str, cmd: list[str], targets: list[str]) -> Optional[Suite]:
+    if len(targets) > MAX_TARGETS:
+        return None
+    name = f"{suite.name} (impacted)"
+    if not targets:
+        logger.info(f"{suite.name}: no tests affected by the change")
+        return Suite(name, kind, [], suite.cwd)
+    logger.info(f"{suite.name}: narrowed to {len(targets)} target(s)")
+    return Suite(name, kind, cmd, suite.cwd)
+
+
+def _walk(root: str, extensions: tuple[str, ...]) -> list[str]:
+    """Repo-relative paths of source files with the given extensions."""
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not d.startswith(".")]
+        for name in filenames:
+            if name.endswith(extensions):
+                full = os.path.join(dirpath, name)
+                paths.append(os.path.relpath(full, root).replace(os.sep, "/"))
+    return paths
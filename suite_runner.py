@@ -0,0 +1,428 @@
+"""
+suite_runner.py — Detect and run a worktree's test suites concurrently.
+
+Each detected framework (npm/jest, pytest, cargo, go) runs as its own
+process, side by side, with its own timeout and optional CPU/memory
+limits, and uses the framework's native parallelism where available
+(pytest-xdist, jest --maxWorkers, go test -p, cargo --test-threads).
+Output is parsed into structured results — pass/fail counts, failing
+test names, duration — rather than handing Claude a raw stdout tail.
+"""
+
+import json
+import os
+import re
+import signal
+import subprocess
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from suite_cache import SuiteResultCache
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Keep this much of each suite's output for failure context
+OUTPUT_TAIL_CHARS = 2000
+
+# Cap on failing test names reported per suite
+MAX_FAILURES = 30
+
+
+@dataclass
+class Suite:
+    """One test command to run in a worktree."""
+    name: str
+    kind: str
+    cmd: list[str]
+    cwd: str
+
+
+@dataclass
+class SuiteResult:
+    """Structured outcome of one suite run."""
+    name: str
+    command: str
+    status: str  # "passed", "failed", "timed_out", "not_found", "error", "no_tests"
+    passed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    failures: list[str] = field(default_factory=list)
+    duration_seconds: float = 0.0
+    output_tail: str = ""
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("passed", "no_tests")
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name, "command": self.command, "status": self.status,
+            "passed": self.passed, "failed": self.failed, "skipped": self.skipped,
+            "failures": self.failures, "duration_seconds": self.duration_seconds,
+            "output_tail": self.output_tail,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SuiteResult":
+        return cls(**{k: data[k] for k in data if k in cls.__dataclass_fields__})
+
+
+class SuiteRunner:
+    """Runs detected suites concurrently with per-suite limits."""
+
+    def __init__(self, config: Optional[dict] = None):
+        """
+        Args:
+            config: The `qa.tests` config block — timeout_seconds,
+                max_parallel_suites, workers ("auto" or a number),
+                max_memory_mb, max_cpu_seconds
+        """
+        config = config or {}
+        self.timeout_seconds = config.get("timeout_seconds", 300)
+        self.max_parallel_suites = max(1, config.get("max_parallel_suites", 4))
+        self.workers = config.get("workers", "auto")
+        self.max_memory_mb = config.get("max_memory_mb")
+        self.max_cpu_seconds = config.get("max_cpu_seconds")
+
+    def detect(self, worktree_path: str) -> list[Suite]:
+        """Find the test frameworks a worktree uses."""
+        suites = []
+
+        def exists(name: str) -> bool:
+            return os.path.exists(os.path.join(worktree_path, name))
+
+        if exists("package.json"):
+            suites.append(Suite(
+                "npm test", "npm", ["npm", "test", "--", "--passWithNoTests"], worktree_path,
+            ))
+        if exists("pytest.ini") or exists("pyproject.toml") or exists("setup.py"):
+            suites.append(Suite(
+                "pytest", "pytest", ["python", "-m", "pytest", "-v", "--tb=short"], worktree_path,
+            ))
+        if exists("Cargo.toml"):
+            suites.append(Suite("cargo test", "cargo", ["cargo", "test"], worktree_path))
+        if exists("go.mod"):
+            suites.append(Suite(
+                "go test", "go", ["go", "test", "-json", "./..."], worktree_path,
+            ))
+        return suites
+
+    def run(
+        self, suites: list[Suite],
+        cache: Optional["SuiteResultCache"] = None,
+        repo: str = "", tree_sha: Optional[str] = None,
+    ) -> list[SuiteResult]:
+        """
+        Run suites concurrently; results come back in the order given.
+
+        Args:
+            suites: Suites to run
+            cache: Result cache; suites already run on this exact tree are
+                answered from it instead of being run
+            repo: Repo the worktree belongs to (part of the cache key)
+            tree_sha: Hash of the working tree (cache is skipped without it)
+        """
+        if not suites:
+            return []
+
+        results: dict[int, SuiteResult] = {}
+        keys: dict[int, str] = {}
+        if cache is not None and tree_sha:
+            for i, suite in enumerate(suites):
+                keys[i] = cache.make_key(repo, tree_sha, " ".join(suite.cmd))
+                cached = cache.get(keys[i])
+                if cached:
+                    logger.info(f"{suite.name}: reusing result for tree {tree_sha[:12]}")
+                    results[i] = cached
+
+        pending = [i for i in range(len(suites)) if i not in results]
+        if pending:
+            workers = self._workers_per_suite(len(pending))
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_parallel_suites, len(pending)),
+                thread_name_prefix="test-suite",
+            ) as pool:
+                ran = pool.map(lambda i: self.run_suite(suites[i], workers), pending)
+                for i, result in zip(pending, ran):
+                    results[i] = result
+                    if i in keys:
+                        cache.store(keys[i], result)
+
+        return [results[i] for i in range(len(suites))]
+
+    def run_suite(self, suite: Suite, workers: int = 1) -> SuiteResult:
+        """Run one suite to completion (or timeout) and parse its output."""
+        if not suite.cmd:
+            # Narrowed by impact selection to nothing
+            return SuiteResult(suite.name, "", "no_tests")
+        cmd = with_parallelism(suite, workers)
+        command = " ".join(cmd)
+        start = time.monotonic()
+        logger.info(f"Running {suite.name}: {command}")
+
+        limits = self._rlimits()
+        try:
+            proc = subprocess.Popen(
+                cmd, cwd=suite.cwd,
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                # Own process group, so a timeout kills the whole tree
+                start_new_session=True,
+                # Set in the child before exec, so every worker it forks
+                # inherits them
+                preexec_fn=(lambda: _set_rlimits(limits)) if limits else None,
+            )
+        except FileNotFoundError:
+            return SuiteResult(suite.name, command, "not_found")
+        except OSError as e:
+            return SuiteResult(suite.name, command, "error", output_tail=str(e))
+
+        try:
+            output, _ = proc.communicate(timeout=self.timeout_seconds)
+            timed_out = False
+        except subprocess.TimeoutExpired:
+            _kill_group(proc)
+            output, _ = proc.communicate()
+            timed_out = True
+
+        result = parse_output(suite.kind, output or "")
+        result.name = suite.name
+        result.command = command
+        result.duration_seconds = round(time.monotonic() - start, 1)
+        if timed_out:
+            result.status = "timed_out"
+        else:
+            result.status = "passed" if proc.returncode == 0 else "failed"
+        logger.info(
+            f"{suite.name}: {result.status} ({result.passed} passed, "
+            f"{result.failed} failed, {result.duration_seconds}s)"
+        )
+        return result
+
+    # ─── Internal ───────────────────────────────────────────────────────
+
+    def _workers_per_suite(self, suite_count: int) -> int:
+        """Split the CPUs between suites running at the same time."""
+        if self.workers != "auto":
+            return max(1, int(self.workers))
+        concurrent = min(self.max_parallel_suites, suite_count)
+        return max(1, (os.cpu_count() or 1) // concurrent)
+
+    def _rlimits(self) -> list[tuple[int, tuple[int, int]]]:
+        """
+        CPU/memory rlimits for a suite's process, as (resource, (soft, hard)).
+        Computed in the parent, capped at the current hard limits, so the
+        child only has to set them.
+        """
+        if resource is None:
+            return []
+        wanted = []
+        if self.max_memory_mb:
+            wanted.append((resource.RLIMIT_AS, int(self.max_memory_mb) * 1024 * 1024))
+        if self.max_cpu_seconds:
+            wanted.append((resource.RLIMIT_CPU, int(self.max_cpu_seconds)))
+
+        limits = []
+        for res, limit in wanted:
+            try:
+                _, hard = resource.getrlimit(res)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not apply resource limits to test process: {e}")
+                continue
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            limits.append((res, (limit, limit)))
+        return limits
+
+
+def _set_rlimits(limits: list[tuple[int, tuple[int, int]]]):
+    """Runs in the forked child before exec: no logging, no locks."""
+    for res, values in limits:
+        try:
+            resource.setrlimit(res, values)
+        except (OSError, ValueError):
+            pass
+
+
+def with_parallelism(suite: Suite, workers: int) -> list[str]:
+    """The suite's command with the framework's parallelism flags added."""
+    cmd = list(suite.cmd)
+    if workers <= 1:
+        return cmd
+    if suite.kind == "pytest" and _has_xdist():
+        cmd += ["-n", str(workers)]
+    elif suite.kind == "npm" and _uses_jest(suite.cwd):
+        cmd += [f"--maxWorkers={workers}"]
+    elif suite.kind == "go":
+        cmd = cmd[:2] + ["-p", str(workers)] + cmd[2:]
+    elif suite.kind == "cargo":
+        cmd += ["--", f"--test-threads={workers}"]
+    return cmd
+
+
+def parse_output(kind: str, output: str) -> SuiteResult:
+    """Pull counts and failing test names out of a framework's output."""
+    result = SuiteResult(name="", command="", status="")
+    parser = _PARSERS.get(kind)
+    if parser:
+        parser(output, result)
+    result.failures = result.failures[:MAX_FAILURES]
+    if not result.output_tail:
+        result.output_tail = output[-OUTPUT_TAIL_CHARS:]
+    return result
+
+
+def format_results(results: list[SuiteResult]) -> str:
+    """Render results as a compact markdown summary for prompts and comments."""
+    if not results:
+        return "No test framework detected."
+
+    icons = {
+        "passed": "✅ PASSED", "failed": "❌ FAILED", "timed_out": "⏰ TIMED OUT",
+        "not_found": "⚠️ Command not found", "error": "⚠️ Error",
+        "no_tests": "➖ No tests affected by this change",
+    }
+    blocks = []
+    for r in results:
+        line = f"**{r.name}**: {icons.get(r.status, r.status)}"
+        if r.status in ("passed", "failed", "timed_out"):
+            line += (
+                f" — {r.passed} passed, {r.failed} failed, {r.skipped} skipped "
+                f"in {r.duration_seconds}s"
+            )
+        if r.cached:
+            line += " (cached: tree unchanged since this run)"
+        if r.failures:
+            line += "\nFailing: " + ", ".join(f"`{f}`" for f in r.failures)
+        if not r.ok and r.output_tail:
+            line += f"\n```\n{r.output_tail[-800:]}\n```"
+        blocks.append(line)
+    return "\n\n".join(blocks)
+
+
+# ─── Output parsers ─────────────────────────────────────────────────────
+
+def _parse_pytest(output: str, result: SuiteResult):
+    # "==== 2 failed, 10 passed, 1 skipped in 3.21s ===="
+    summary = re.findall(r"^=+ (.*?) in [\d.]+s", output, re.MULTILINE)
+    if summary:
+        for count, word in re.findall(r"(\d+) (\w+)", summary[-1]):
+            if word == "passed":
+                result.passed = int(count)
+            elif word in ("failed", "error", "errors"):
+                result.failed += int(count)
+            elif word in ("skipped", "deselected", "xfailed"):
+                result.skipped += int(count)
+    result.failures = re.findall(r"^(?:FAILED|ERROR) (\S+)", output, re.MULTILINE)
+
+
+def _parse_jest(output: str, result: SuiteResult):
+    # "Tests:       1 failed, 2 skipped, 12 passed, 15 total"
+    match = re.search(r"^Tests:\s+(.*)$", output, re.MULTILINE)
+    if match:
+        for count, word in re.findall(r"(\d+) (\w+)", match.group(1)):
+            if word == "passed":
+                result.passed = int(count)
+            elif word == "failed":
+                result.failed = int(count)
+            elif word in ("skipped", "todo"):
+                result.skipped += int(count)
+    result.failures = [m.strip() for m in re.findall(r"^\s*● (.+›.+)$", output, re.MULTILINE)]
+
+
+def _parse_cargo(output: str, result: SuiteResult):
+    # "test result: FAILED. 5 passed; 1 failed; 2 ignored; ..."
+    for passed, failed, ignored in re.findall(
+        r"test result: \w+\. (\d+) passed; (\d+) failed; (\d+) ignored", output,
+    ):
+        result.passed += int(passed)
+        result.failed += int(failed)
+        result.skipped += int(ignored)
+    result.failures = re.findall(r"^test (\S+) \.\.\. FAILED", output, re.MULTILINE)
+
+
+def _parse_go(output: str, result: SuiteResult):
+    events = 0
+    text = []
+    for line in output.splitlines():
+        if not line.startswith("{"):
+            continue
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        events += 1
+        text.append(event.get("Output", ""))
+        if not event.get("Test"):
+            continue
+        action = event.get("Action")
+        if action == "pass":
+            result.passed += 1
+        elif action == "fail":
+            result.failed += 1
+            result.failures.append(f"{event.get('Package', '')}.{event['Test']}")
+        elif action == "skip":
+            result.skipped += 1
+
+    if events:
+        # Readable output instead of raw JSON events
+        result.output_tail = "".join(text)[-OUTPUT_TAIL_CHARS:]
+    else:
+        # Plain `go test` output (no -json)
+        result.failures = re.findall(r"^\s*--- FAIL: (\S+)", output, re.MULTILINE)
+        result.failed = len(result.failures)
+        result.passed = len(re.findall(r"^\s*--- PASS: ", output, re.MULTILINE))
+
+
+_PARSERS = {
+    "pytest": _parse_pytest,
+    "npm": _parse_jest,
+    "cargo": _parse_cargo,
+    "go": _parse_go,
+}
+
+
+# ─── Helpers ────────────────────────────────────────────────────────────
+
+_xdist_available: Optional[bool] = None
+
+
+def _has_xdist() -> bool:
+    """Whether pytest-xdist is installed for the `python` tests run with."""
+    global _xdist_available
+    if _xdist_available is None:
+        try:
+            check = subprocess.run(
+                ["python", "-c", "import xdist"], capture_output=True, timeout=30,
+            )
+            _xdist_available = check.returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            _xdist_available = False
+    return _xdist_available
+
+
+def _uses_jest(worktree_path: str) -> bool:
+    """Whether the package's test script runs jest."""
+    try:
+        with open(os.path.join(worktree_path, "package.json"), "r") as f:
+            scripts = json.load(f).get("scripts", {})
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return False
+    return "jest" in str(scripts.get("test", ""))
+
+
+def _kill_group(proc: subprocess.Popen):
+    """Kill a suite's whole process group."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        proc.kill()
@@ -1,15 +1,32 @@
 """
 task_parser.py — Parse GitHub issue frontmatter and body into a structured task.
+
+A task is split in two:
+
+- TaskSpec: what the issue says (frontmatter, body, stage label). Slotted
+  and immutable, with body sections decoded on first access. Specs are
+  memoized: an issue whose `updated_at` hasn't changed is served from a
+  bounded cache, and when only its labels or title changed the
+  frontmatter and body are reused.
+- TaskState: what a run has done (stage, review/QA cycles, PR, branch).
+  A small mutable record that can be persisted on its own.
+
+Task puts the two together; callers read and write attributes on it as
+before.
 """
 
-import frontmatter
-from dataclasses import dataclass, field
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, fields, replace
 from typing import Optional
 
+import frontmatter
 
-@dataclass
-class Task:
-    """Represents a parsed task from a GitHub issue."""
+
+@dataclass(frozen=True, slots=True)
+class TaskSpec:
+    """Immutable parse of an issue, shared between callers via the cache."""
     # GitHub issue metadata
     issue_number: int
     issue_url: str
@@ -27,21 +44,29 @@ class Task:
     night_only: bool = False
     persona: str = "product"            # entry persona
     group: Optional[str] = None
-    depends_on: list = field(default_factory=list)
+    depends_on: tuple = ()
     human_review: bool = False
 
-    # Parsed body sections
-    task_description: str = ""
-    context: str = ""
-    acceptance_criteria: str = ""
+    # Stage from the issue's labels when parsed
+    stage: str = "triage"
 
-    # Runtime state
-    current_stage: str = "triage"
-    review_cycles: int = 0
-    qa_cycles: int = 0
-    pr_number: Optional[int] = None
-    pr_url: Optional[str] = None
-    branch_name: str = ""
+    # Body without frontmatter; sections are decoded from it on demand
+    content: str = field(default="", repr=False)
+    _sections: Optional[tuple[str, str, str]] = field(
+        default=None, init=False, repr=False, compare=False,
+    )
+
+    @property
+    def task_description(self) -> str:
+        return self._decoded()[0]
+
+    @property
+    def context(self) -> str:
+        return self._decoded()[1]
+
+    @property
+    def acceptance_criteria(self) -> str:
+        return self._decoded()[2]
 
     @property
     def target_owner(self) -> str:
@@ -69,9 +94,83 @@ class Task:
             parts.append(f"## Acceptance Criteria\n{self.acceptance_criteria}")
         return "\n\n".join(parts) if parts else self.raw_body
 
+    def _decoded(self) -> tuple[str, str, str]:
+        if self._sections is None:
+            # Frozen, but the decoded sections are a pure cache of `content`
+            object.__setattr__(self, "_sections", _parse_body_sections(self.content))
+        return self._sections
+
+
+@dataclass(slots=True)
+class TaskState:
+    """Mutable runtime state of a task, separate from its spec."""
+    issue_number: int
+    current_stage: str = "triage"
+    review_cycles: int = 0
+    qa_cycles: int = 0
+    pr_number: Optional[int] = None
+    pr_url: Optional[str] = None
+    branch_name: str = ""
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TaskState":
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+
+_STATE_FIELDS = frozenset(f.name for f in fields(TaskState)) - {"issue_number"}
+
+
+class Task:
+    """
+    A task as a run sees it: spec attributes are read-only, runtime state
+    attributes (current_stage, review_cycles, pr_number, ...) are writable.
+    """
+
+    __slots__ = ("spec", "state")
+
+    def __init__(self, spec: TaskSpec, state: Optional[TaskState] = None):
+        object.__setattr__(self, "spec", spec)
+        object.__setattr__(self, "state", state or TaskState(
+            issue_number=spec.issue_number,
+            current_stage=spec.stage,
+            branch_name=f"{spec.branch_prefix}/{spec.issue_number}",
+        ))
+
+    def __getattr__(self, name: str):
+        if name in _STATE_FIELDS:
+            return getattr(self.state, name)
+        return getattr(self.spec, name)
+
+    def __setattr__(self, name: str, value):
+        if name not in _STATE_FIELDS:
+            raise AttributeError(f"Task.{name} is part of the issue's spec and read-only")
+        setattr(self.state, name, value)
+
+    def __repr__(self) -> str:
+        return f"Task(#{self.spec.issue_number} {self.spec.title!r}, {self.state!r})"
+
 
 PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
 
+# Issues kept in the parse cache
+PARSE_CACHE_SIZE = 1024
+
+
+@dataclass(frozen=True, slots=True)
+class _CacheEntry:
+    updated_at: str
+    body_digest: str
+    labels: tuple
+    view: TaskSpec
+
+
+_cache: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+_cache_lock = threading.Lock()
+
 
 def parse_issue(issue: dict) -> Task:
     """
@@ -81,9 +180,53 @@ def parse_issue(issue: dict) -> Task:
         issue: GitHub API issue response dict
 
     Returns:
-        Parsed Task object
+        Parsed Task object (shared spec, fresh runtime state)
+    """
+    return Task(parse_issue_view(issue))
+
+
+def parse_issue_view(issue: dict) -> TaskSpec:
+    """
+    Parse a GitHub issue dict into the shared, read-only TaskSpec.
+
+    Cheaper than parse_issue for callers that only read the task (e.g.
+    selection over the whole queue).
     """
+    number = issue["number"]
+    updated_at = issue.get("updated_at") or ""
+    labels = tuple(l["name"] for l in issue.get("labels", []))
+
+    with _cache_lock:
+        entry = _cache.get(number)
+        if entry:
+            _cache.move_to_end(number)
+    # Labels are compared too: local label updates don't bump updated_at
+    if entry and updated_at and entry.updated_at == updated_at and entry.labels == labels:
+        return entry.view
+
     body = issue.get("body", "") or ""
+    body_digest = hashlib.sha1(body.encode("utf-8")).hexdigest()
+    if entry and entry.body_digest == body_digest:
+        # Labels or title changed: keep the parsed frontmatter and sections
+        view = replace(
+            entry.view,
+            issue_url=issue["html_url"],
+            title=issue["title"],
+            stage=_stage_from_labels(list(labels)),
+        )
+    else:
+        view = _parse(issue, body, labels)
+
+    with _cache_lock:
+        _cache[number] = _CacheEntry(updated_at, body_digest, labels, view)
+        _cache.move_to_end(number)
+        while len(_cache) > PARSE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return view
+
+
+def _parse(issue: dict, body: str, labels: tuple) -> TaskSpec:
+    """Full parse of an issue's frontmatter and stage (sections are decoded lazily)."""
 
     # Parse frontmatter
     try:
@@ -94,19 +237,16 @@ def parse_issue(issue: dict) -> Task:
         metadata = {}
         content = body
 
-    # Parse body sections
-    task_desc, context, criteria = _parse_body_sections(content)
-
     # Determine current stage from labels
-    labels = [l["name"] for l in issue.get("labels", [])]
-    current_stage = _stage_from_labels(labels)
+    stage = _stage_from_labels(list(labels))
 
     # Parse depends_on
-    depends_on = metadata.get("depends_on", [])
-    if isinstance(depends_on, int):
+    depends_on = metadata.get("depends_on") or []
+    if isinstance(depends_on, (int, str)):
+        # A single dependency, e.g. `depends_on: 12` or `depends_on: "#12"`
         depends_on = [depends_on]
 
-    task = Task(
+    return TaskSpec(
         issue_number=issue["number"],
         issue_url=issue["html_url"],
         title=issue["title"],
@@ -121,18 +261,12 @@ def parse_issue(issue: dict) -> Task:
         night_only=metadata.get("night_only", False),
         persona=metadata.get("persona", "product"),
         group=metadata.get("group", None),
-        depends_on=depends_on,
+        depends_on=tuple(depends_on),
         human_review=metadata.get("human_review", False),
-        task_description=task_desc,
-        context=context,
-        acceptance_criteria=criteria,
-        current_stage=current_stage,
+        stage=stage,
+        content=content,
     )
 
-    task.branch_name = f"{task.branch_prefix}/{task.issue_number}"
-
-    return task
-
 
 def _parse_body_sections(content: str) -> tuple[str, str, str]:
     """
@@ -0,0 +1,255 @@
+"""
+task_queue.py — Persistent ready-queue with aging and cost-aware ordering.
+
+The queue keeps a parsed summary of every ready issue under DATA_DIR and
+is synced incrementally: only issues that are new or whose `updated_at`
+changed are parsed again. Entries are ordered by a score combining
+
+- priority (high counts double medium, medium double low),
+- aging: waiting adds to the score, so low priority work can't starve,
+- expected runtime from historical stage timings: cheaper tasks score
+  higher, and in the night window tasks that won't finish before it
+  closes go last, so the window fits the most work.
+"""
+
+import json
+import os
+import logging
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+from task_parser import parse_issue_view
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = os.environ.get("DATA_DIR", "/data")
+
+PRIORITY_VALUE = {"high": 4.0, "medium": 2.0, "low": 1.0}
+
+# Stages a task passes through in one run, and a guess (minutes) for each
+# until there's history
+STAGES = ("triage", "design", "development", "code-review")
+DEFAULT_STAGE_MINUTES = {"triage": 3, "design": 10, "development": 30, "code-review": 10}
+DEFAULT_EXPECTED_MINUTES = sum(DEFAULT_STAGE_MINUTES.values())
+
+# Weight of the newest sample in a stage's moving average
+EWMA_ALPHA = 0.3
+
+# Don't let near-zero estimates dominate the score
+MIN_EXPECTED_MINUTES = 5
+
+
+@dataclass
+class QueueEntry:
+    """What selection needs to know about a ready issue."""
+    issue_number: int
+    updated_at: str
+    enqueued_at: str
+    title: str = ""
+    repo: str = ""
+    priority: str = "medium"
+    schedule: str = "once"
+    night_only: bool = False
+    group: Optional[str] = None
+    depends_on: list = field(default_factory=list)
+
+    def waiting_days(self, now: datetime) -> float:
+        try:
+            enqueued = datetime.fromisoformat(self.enqueued_at.replace("Z", "+00:00"))
+        except ValueError:
+            return 0.0
+        if enqueued.tzinfo is None:
+            enqueued = enqueued.replace(tzinfo=timezone.utc)
+        return max(0.0, (now - enqueued).total_seconds() / 86400)
+
+
+class ReadyQueue:
+    """Ready issues keyed by number, persisted and scored for selection."""
+
+    def __init__(
+        self, data_dir: Optional[str] = DEFAULT_DATA_DIR,
+        aging_per_day: float = 0.5, max_aging: float = 3.0,
+        cost_weight: float = 0.25,
+    ):
+        """
+        Args:
+            data_dir: Where the queue is persisted (None keeps it in memory)
+            aging_per_day: Score added per day an issue has been waiting
+            max_aging: Cap on the aging bonus
+            cost_weight: How strongly expected runtime lowers the score
+                (0 ignores it; score = value / minutes ** cost_weight)
+        """
+        self.data_file = os.path.join(data_dir, "ready_queue.json") if data_dir else None
+        self.aging_per_day = aging_per_day
+        self.max_aging = max_aging
+        self.cost_weight = cost_weight
+        self._lock = threading.Lock()
+        self.entries: dict[int, QueueEntry] = {}
+        if data_dir:
+            os.makedirs(data_dir, exist_ok=True)
+        self._load()
+
+    def sync(self, issues: list[dict]) -> list[QueueEntry]:
+        """
+        Bring the queue in line with the current ready issues.
+
+        Args:
+            issues: Every open 'claude' + 'ready' issue
+
+        Returns:
+            The queue's entries, in the order the issues were given
+        """
+        with self._lock:
+            changed = False
+            current = {}
+            for issue in issues:
+                number = issue["number"]
+                entry = self.entries.get(number)
+                updated_at = issue.get("updated_at", "")
+                if entry is None or entry.updated_at != updated_at or not updated_at:
+                    enqueued_at = entry.enqueued_at if entry else (
+                        issue.get("created_at") or _utcnow()
+                    )
+                    entry = self._entry_for(issue, enqueued_at)
+                    changed = True
+                current[number] = entry
+            if set(current) != set(self.entries):
+                changed = True
+            self.entries = current
+            if changed:
+                self._save()
+            return list(current.values())
+
+    def score(
+        self, entry: QueueEntry, expected_minutes: float, now: datetime,
+        priority: Optional[str] = None,
+    ) -> float:
+        """
+        Selection score (higher runs first).
+
+        Args:
+            entry: The queued issue
+            expected_minutes: Estimated runtime
+            now: Current time (timezone-aware)
+            priority: Priority to use instead of the entry's own (e.g. one
+                inherited from dependent tasks)
+        """
+        value = PRIORITY_VALUE.get(priority or entry.priority, PRIORITY_VALUE["medium"])
+        value += min(self.max_aging, self.aging_per_day * entry.waiting_days(now))
+        minutes = max(expected_minutes, MIN_EXPECTED_MINUTES)
+        return value / minutes ** self.cost_weight
+
+    # ─── Internal ───────────────────────────────────────────────────────
+
+    @staticmethod
+    def _entry_for(issue: dict, enqueued_at: str) -> QueueEntry:
+        task = parse_issue_view(issue)
+        return QueueEntry(
+            issue_number=task.issue_number,
+            updated_at=issue.get("updated_at", ""),
+            enqueued_at=enqueued_at,
+            title=task.title,
+            repo=task.repo,
+            priority=task.priority,
+            schedule=task.schedule,
+            night_only=bool(task.night_only),
+            group=task.group,
+            depends_on=list(task.depends_on or []),
+        )
+
+    def _load(self):
+        """Load the queue from disk."""
+        if not self.data_file or not os.path.exists(self.data_file):
+            return
+        try:
+            with open(self.data_file, "r") as f:
+                data = json.load(f)
+            self.entries = {
+                int(number): QueueEntry(**entry) for number, entry in data.items()
+            }
+        except (json.JSONDecodeError, IOError, TypeError) as e:
+            logger.warning(f"Failed to load ready queue: {e}")
+            self.entries = {}
+
+    def _save(self):
+        """Persist the queue to disk. Caller must hold the lock."""
+        if not self.data_file:
+            return
+        tmp_file = f"{self.data_file}.tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump({n: asdict(e) for n, e in self.entries.items()}, f, indent=2)
+            os.replace(tmp_file, self.data_file)
+        except IOError as e:
+            logger.error(f"Failed to save ready queue: {e}")
+
+
+class StageTimings:
+    """Moving averages of time spent per stage, per repo and overall."""
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR):
+        self.data_file = os.path.join(data_dir, "stage_timings.json")
+        self._lock = threading.Lock()
+        os.makedirs(data_dir, exist_ok=True)
+        self._load()
+
+    def record(self, repo: str, stage_seconds: dict[str, float]):
+        """
+        Fold one run's time per stage into the averages.
+
+        Args:
+            repo: Target repo of the task ("" if none)
+            stage_seconds: Seconds spent in each stage during the run
+        """
+        with self._lock:
+            for key in filter(None, ("*", repo)):
+                averages = self.data.setdefault(key, {})
+                for stage, seconds in stage_seconds.items():
+                    minutes = seconds / 60
+                    previous = averages.get(stage)
+                    averages[stage] = round(
+                        minutes if previous is None
+                        else EWMA_ALPHA * minutes + (1 - EWMA_ALPHA) * previous,
+                        2,
+                    )
+            self._save()
+
+    def expected_minutes(self, repo: str = "") -> float:
+        """Expected runtime of a task from the start, for a repo."""
+        with self._lock:
+            per_repo = self.data.get(repo, {}) if repo else {}
+            overall = self.data.get("*", {})
+            return sum(
+                per_repo.get(stage, overall.get(stage, DEFAULT_STAGE_MINUTES[stage]))
+                for stage in STAGES
+            )
+
+    # ─── Internal ───────────────────────────────────────────────────────
+
+    def _load(self):
+        """Load timings from disk."""
+        if os.path.exists(self.data_file):
+            try:
+                with open(self.data_file, "r") as f:
+                    self.data = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Failed to load stage timings: {e}")
+                self.data = {}
+        else:
+            self.data = {}
+
+    def _save(self):
+        """Persist timings to disk. Caller must hold the lock."""
+        tmp_file = f"{self.data_file}.tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(tmp_file, self.data_file)
+        except IOError as e:
+            logger.error(f"Failed to save stage timings: {e}")
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat()
@@ -5,12 +5,16 @@ Flow: Triage → Design → Develop → PR → Code Review → Tag Human
 Each stage is owned by a persona. Communication happens via GitHub issue comments.
 """
 
+import time
 import logging
 from typing import Optional
 from task_parser import Task, parse_issue
 from github_client import GitHubClient
-from worktree_manager import WorktreeManager
+from worktree_manager import WorktreeManager, paths_from_text
 from recurring import RecurringTracker
+from claude_sessions import SessionStore
+from task_queue import StageTimings
+from task_state import TaskStateStore, ACTIVE_STAGES
 from personas import (
     ProductOwnerPersona,
     ArchitectPersona,
@@ -21,7 +25,12 @@ logger = logging.getLogger(__name__)
 
 
 class TaskRunner:
-    """Runs a single task through its full lifecycle."""
+    """
+    Runs a single task through its full lifecycle.
+
+    Create one runner per task when running tasks concurrently; the
+    GitHub client, worktree manager and recurring tracker may be shared.
+    """
 
     def __init__(
         self,
@@ -29,16 +38,26 @@ class TaskRunner:
         worktree_manager: WorktreeManager,
         recurring: RecurringTracker,
         config: dict,
+        sessions: Optional[SessionStore] = None,
+        timings: Optional[StageTimings] = None,
+        states: Optional[TaskStateStore] = None,
     ):
         self.github = github
         self.worktree = worktree_manager
         self.recurring = recurring
         self.config = config
-
-        # Initialize personas
-        self.product_owner = ProductOwnerPersona(github, config)
-        self.architect = ArchitectPersona(github, config, worktree_manager)
-        self.developer = DeveloperPersona(github, config, worktree_manager)
+        self.sessions = sessions
+        self.timings = timings
+        self.states = states
+        # Seconds spent per stage during the current run
+        self.stage_seconds: dict[str, float] = {}
+        # Checkpoint reached in the current stage by an interrupted run
+        self._checkpoint: Optional[str] = None
+
+        # Initialize personas (sharing the task's resumable CLI sessions)
+        self.product_owner = ProductOwnerPersona(github, config, sessions)
+        self.architect = ArchitectPersona(github, config, worktree_manager, sessions)
+        self.developer = DeveloperPersona(github, config, worktree_manager, sessions)
 
     def run(self, issue: dict) -> bool:
         """
@@ -54,20 +73,26 @@ class TaskRunner:
             True if the task completed (done or failed), False if blocked
         """
         task = parse_issue(issue)
+        labels = [l["name"] for l in issue.get("labels", [])]
+        if self.states:
+            self.states.restore(task)
+            if "ready" in labels:
+                # A fresh pass (new, or sent back by a human)
+                self.states.reset_iterations(task.issue_number)
+        self.stage_seconds = {}
+        self._checkpoint = None
         logger.info(
             f"▶ Running task #{task.issue_number}: {task.title} "
             f"(stage: {task.current_stage})"
         )
 
-        # Swap from 'ready' to first stage
-        if task.current_stage == "triage" and "ready" in [
-            l["name"] for l in issue.get("labels", [])
-        ]:
-            self.github.remove_label(task.issue_number, "ready")
-            self.github.set_stage_label(task.issue_number, "triage")
-
-        worktree_path = None
+        # Swap from 'ready' to first stage (one request — 'ready' is a stage label)
+        if task.current_stage == "triage" and "ready" in labels:
+            self.github.set_stage_label(
+                task.issue_number, "triage", current_labels=labels,
+            )
 
+        result = None
         try:
             # Drive the task through stages
             result = self._drive(task)
@@ -77,6 +102,8 @@ class TaskRunner:
                 # Record if recurring
                 if task.schedule != "once":
                     self.recurring.record_run(task.issue_number, task.schedule)
+                self._forget_sessions(task)
+                self._forget_state(task)
                 return True
 
             elif result == "blocked":
@@ -85,6 +112,8 @@ class TaskRunner:
 
             elif result == "failed":
                 logger.info(f"❌ Task #{task.issue_number} failed")
+                self._forget_sessions(task)
+                self._forget_state(task)
                 return True
 
             else:
@@ -104,8 +133,17 @@ class TaskRunner:
             return True
 
         finally:
-            # Always clean up worktrees
-            self.worktree.cleanup_all()
+            # Feed expected-runtime estimates for scheduling
+            if self.timings and self.stage_seconds:
+                self.timings.record(task.repo, self.stage_seconds)
+
+            # Clean up this task's worktree only — other workers may still
+            # be using theirs. A blocked task keeps it, so the run after the
+            # human responds picks up the same checkout.
+            if task.repo and result != "blocked":
+                self.worktree.remove_task_worktree(
+                    task.repo, task.branch_name, task.issue_number,
+                )
 
     def handle_human_response(self, issue: dict):
         """
@@ -116,14 +154,18 @@ class TaskRunner:
         - Changes: move back to 'development' stage for the pipeline to re-run.
         """
         task = parse_issue(issue)
+        if self.states:
+            self.states.restore(task)
+        # Timings are per run(); don't carry anything into the next sample
+        self.stage_seconds = {}
         issue_num = task.issue_number
         logger.info(f"Handling human response on #{issue_num}")
 
-        comments = self.github.get_issue_comments(issue_num)
-        if not comments:
+        latest = self.github.get_latest_comment(issue_num)
+        if not latest:
             return
 
-        latest_body = comments[-1].get("body", "").lower().strip()
+        latest_body = latest.get("body", "").lower().strip()
 
         approve_keywords = ["approved", "approve", "lgtm", "merge", "looks good", "ship it"]
         changes_keywords = ["changes", "fix", "update", "revise"]
@@ -154,6 +196,12 @@ class TaskRunner:
 
             self.github.set_stage_label(issue_num, "done")
             self.github.close_issue(issue_num)
+            self._forget_sessions(task)
+            self._forget_state(task)
+            if task.repo:
+                self.worktree.remove_task_worktree(
+                    task.repo, task.branch_name, task.issue_number,
+                )
             logger.info(f"✅ #{issue_num} approved — PR merged, issue closed")
 
         elif is_changes:
@@ -176,16 +224,32 @@ class TaskRunner:
         Returns:
             One of: "done", "blocked", "failed"
         """
-        max_iterations = 20  # Safety limit to prevent infinite loops
+        # Safety limits to prevent infinite loops, counted across restarts
+        # when task state is kept
+        max_iterations = 20
+        max_stage_attempts = self.config.get("limits", {}).get("max_stage_attempts", 3)
         iteration = 0
 
         while iteration < max_iterations:
             iteration += 1
+            stage = task.current_stage
+
+            if self.states and stage in ACTIVE_STAGES:
+                record = self.states.stage_started(task.state)
+                iteration = max(iteration, record.iterations)
+                if iteration > max_iterations:
+                    break
+                if record.stage_attempts > max_stage_attempts:
+                    return self._fail_interrupted(task, record.stage_attempts - 1)
+                self._checkpoint = record.checkpoint
+
             logger.info(
-                f"  Stage: {task.current_stage} "
+                f"  Stage: {stage} "
                 f"(iteration {iteration}/{max_iterations})"
             )
 
+            started = time.monotonic()
+
             if task.current_stage == "triage":
                 result = self._run_triage(task)
 
@@ -208,6 +272,16 @@ class TaskRunner:
                 logger.error(f"Unknown stage: {task.current_stage}")
                 return "failed"
 
+            self.stage_seconds[stage] = (
+                self.stage_seconds.get(stage, 0.0) + time.monotonic() - started
+            )
+            self._checkpoint = None
+            if self.states:
+                session_id = self._session_id(stage)
+                self.states.stage_finished(
+                    task.state, **({"session_id": session_id} if session_id else {}),
+                )
+
             # Check result
             if result == "continue":
                 continue
@@ -255,10 +329,18 @@ class TaskRunner:
         if not worktree_path:
             return "failed"
 
-        is_revision = task.review_cycles > 0 or task.qa_cycles > 0
-        success = self.developer.execute(task, worktree_path, is_revision=is_revision)
-        if not success:
-            return "failed"
+        if self._checkpoint == "pushed":
+            # An interrupted run already implemented and pushed the changes
+            logger.info(
+                f"#{task.issue_number}: changes were pushed before the restart, "
+                "continuing from there"
+            )
+        else:
+            is_revision = task.review_cycles > 0 or task.qa_cycles > 0
+            success = self.developer.execute(task, worktree_path, is_revision=is_revision)
+            if not success:
+                return "failed"
+            self._save_checkpoint(task, "pushed")
 
         # Create or update the PR
         if not task.pr_number:
@@ -293,6 +375,7 @@ class TaskRunner:
                 f"Code review passed. PR is ready for your review.\n\n"
                 f"**PR:** {task.pr_url or f'#{task.pr_number}'}",
             )
+            task.current_stage = "awaiting-human"
             return "blocked"
         elif verdict == "changes_required":
             return "continue"  # Will loop back to development
@@ -328,7 +411,10 @@ class TaskRunner:
                 task.branch_name,
                 base_branch=default_branch,
                 issue_number=task.issue_number,
+                sparse_paths=self._sparse_paths(task),
             )
+            if self.states:
+                self.states.save(task.state, worktree_path=worktree_path)
             return worktree_path
 
         except Exception as e:
@@ -340,6 +426,70 @@ class TaskRunner:
             self.github.set_stage_label(task.issue_number, "failed")
             return None
 
+    def _forget_sessions(self, task: Task):
+        """Drop all of the task's CLI sessions once it's finished (or will restart fresh)."""
+        if self.sessions:
+            self.sessions.forget(task.issue_number)
+
+    def _forget_state(self, task: Task):
+        """Drop the task's saved runtime state once it's finished."""
+        if self.states:
+            self.states.forget(task.issue_number)
+
+    def _save_checkpoint(self, task: Task, checkpoint: str):
+        """Record a step of the current stage a restarted run needn't repeat."""
+        self._checkpoint = checkpoint
+        if self.states:
+            session_id = self._session_id(task.current_stage)
+            self.states.save(
+                task.state, checkpoint=checkpoint,
+                **({"session_id": session_id} if session_id else {}),
+            )
+
+    def _session_id(self, stage: str) -> Optional[str]:
+        """Claude CLI session of the persona that ran a stage, if known."""
+        persona = {
+            "triage": self.product_owner,
+            "design": self.architect,
+            "development": self.developer,
+            "code-review": self.architect,
+        }.get(stage)
+        if persona and persona.last_run:
+            return persona.last_run.session_id
+        return None
+
+    def _fail_interrupted(self, task: Task, interruptions: int) -> str:
+        """Give up on a stage that keeps being interrupted mid-run."""
+        logger.error(
+            f"Task #{task.issue_number}: {task.current_stage} was interrupted "
+            f"{interruptions} times, giving up"
+        )
+        self.github.post_persona_comment(
+            task.issue_number, "system",
+            f"⚠️ The **{task.current_stage}** stage was interrupted {interruptions} "
+            "times before finishing (e.g. the runner crashed or was restarted "
+            "mid-stage). Marking as failed.",
+        )
+        self.github.set_stage_label(task.issue_number, "failed")
+        return "failed"
+
+    def _sparse_paths(self, task: Task) -> Optional[list[str]]:
+        """
+        Paths to scope a sparse checkout to, or None for a full checkout.
+
+        Taken from the task body and the issue thread (which holds the
+        architect's plan and review feedback once those stages have run).
+        """
+        if not self.config.get("workspace", {}).get("sparse_checkout", False):
+            return None
+        if task.new_repo:
+            return None
+
+        texts = [task.full_prompt or ""]
+        for comment in self.github.get_issue_comments(task.issue_number):
+            texts.append(comment.get("body") or "")
+        return paths_from_text("\n".join(texts))
+
     def _create_pr(self, task: Task) -> bool:
         """Create a pull request for the task."""
         default_branch = self.github.get_default_branch(task.repo)
@@ -0,0 +1,254 @@
+"""
+task_state.py — Durable per-task state, so a restart resumes work in flight.
+
+Review/QA cycle counts, the PR and the branch are only known to the
+process driving a task, and a container restart used to lose them. Each
+task's record lives in SQLite under DATA_DIR (WAL mode, one transaction
+per update) and also keeps:
+
+- the worktree path and the last Claude CLI session id
+- a checkpoint within the current stage (e.g. the developer's changes
+  are pushed), so a restarted run picks up after the paid-for step
+  instead of repeating it
+- how many times the current stage was started without finishing, and
+  how many stages the task has run overall, so a stage that keeps
+  taking the process down — or a task cycling between stages — fails
+  instead of looping across restarts
+- when the task, and its current stage, started
+"""
+
+import os
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
+from typing import Optional
+
+from task_parser import Task, TaskState
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = os.environ.get("DATA_DIR", "/data")
+
+# Stages a runner drives; a record in one of these is work in flight
+ACTIVE_STAGES = ("triage", "design", "development", "code-review")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS task_state (
+    issue_number     INTEGER PRIMARY KEY,
+    current_stage    TEXT NOT NULL,
+    review_cycles    INTEGER NOT NULL DEFAULT 0,
+    qa_cycles        INTEGER NOT NULL DEFAULT 0,
+    pr_number        INTEGER,
+    pr_url           TEXT,
+    branch_name      TEXT NOT NULL DEFAULT '',
+    worktree_path    TEXT,
+    session_id       TEXT,
+    checkpoint       TEXT,
+    stage_attempts   INTEGER NOT NULL DEFAULT 0,
+    iterations       INTEGER NOT NULL DEFAULT 0,
+    created_at       TEXT NOT NULL,
+    stage_started_at TEXT,
+    updated_at       TEXT NOT NULL
+)
+"""
+
+_STATE_COLUMNS = tuple(f.name for f in fields(TaskState))
+
+
+@dataclass
+class TaskRecord:
+    """A task's saved state plus the bookkeeping needed to resume it."""
+    state: TaskState
+    worktree_path: Optional[str] = None
+    session_id: Optional[str] = None
+    checkpoint: Optional[str] = None
+    stage_attempts: int = 0
+    iterations: int = 0
+    created_at: str = ""
+    stage_started_at: Optional[str] = None
+    updated_at: str = ""
+
+    @property
+    def in_flight(self) -> bool:
+        return self.state.current_stage in ACTIVE_STAGES
+
+
+class TaskStateStore:
+    """Issue number → TaskRecord in SQLite. Safe to share between workers."""
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR):
+        os.makedirs(data_dir, exist_ok=True)
+        self.db_file = os.path.join(data_dir, "task_state.db")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+
+    def get(self, issue_number: int) -> Optional[TaskState]:
+        record = self.record(issue_number)
+        return record.state if record else None
+
+    def record(self, issue_number: int) -> Optional[TaskRecord]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM task_state WHERE issue_number = ?", (issue_number,),
+            ).fetchone()
+        return _to_record(row) if row else None
+
+    def in_flight(self) -> list[TaskRecord]:
+        """Records of tasks that were in an active stage when last saved."""
+        placeholders = ",".join("?" * len(ACTIVE_STAGES))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT * FROM task_state WHERE current_stage IN ({placeholders}) "
+                "ORDER BY updated_at",
+                ACTIVE_STAGES,
+            ).fetchall()
+        return [_to_record(row) for row in rows]
+
+    def worktree_paths(self) -> set[str]:
+        """Worktrees of tasks not yet finished (in flight or awaiting a human)."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT worktree_path FROM task_state WHERE worktree_path IS NOT NULL",
+            ).fetchall()
+        return {row["worktree_path"] for row in rows}
+
+    def save(self, state: TaskState, **extra):
+        """
+        Save a task's runtime state.
+
+        Args:
+            state: The task's TaskState
+            **extra: Other columns to set (e.g. worktree_path, session_id,
+                checkpoint)
+        """
+        values = {**state.to_dict(), **extra}
+        with self._lock, self._db:
+            self._upsert(values)
+
+    def stage_started(self, state: TaskState) -> TaskRecord:
+        """
+        Note that a run is starting the task's current stage.
+
+        If the record shows that stage already started and never finished,
+        the previous run was interrupted: this counts as another attempt,
+        and the checkpoint is kept so the run can skip work already done.
+
+        Returns:
+            The updated record
+        """
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT current_stage, checkpoint, stage_attempts, stage_started_at "
+                "FROM task_state WHERE issue_number = ?", (state.issue_number,),
+            ).fetchone()
+            retry = bool(
+                row and row["current_stage"] == state.current_stage
+                and row["stage_started_at"]
+            )
+            self._upsert({
+                **state.to_dict(),
+                "checkpoint": row["checkpoint"] if retry else None,
+                "stage_attempts": row["stage_attempts"] + 1 if retry else 1,
+                "stage_started_at": row["stage_started_at"] if retry else _utcnow(),
+            })
+            self._db.execute(
+                "UPDATE task_state SET iterations = iterations + 1 "
+                "WHERE issue_number = ?", (state.issue_number,),
+            )
+            row = self._db.execute(
+                "SELECT * FROM task_state WHERE issue_number = ?", (state.issue_number,),
+            ).fetchone()
+        return _to_record(row)
+
+    def stage_finished(self, state: TaskState, **extra):
+        """
+        Save state after a stage ran to completion (the task has usually
+        moved on to its next stage, which hasn't started yet).
+        """
+        self.save(
+            state, checkpoint=None, stage_attempts=0, stage_started_at=None, **extra,
+        )
+
+    def reset_iterations(self, issue_number: int):
+        """Start the task over (e.g. it was sent back to ready), keeping cycles and PR."""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE task_state SET iterations = 0, stage_attempts = 0, "
+                "checkpoint = NULL, stage_started_at = NULL WHERE issue_number = ?",
+                (issue_number,),
+            )
+
+    def forget(self, issue_number: int):
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM task_state WHERE issue_number = ?", (issue_number,),
+            )
+
+    def restore(self, task: Task) -> Optional[TaskRecord]:
+        """
+        Carry saved runtime state over to a freshly parsed task.
+
+        The stage stays as parsed: labels are the source of truth for it,
+        since a human may have moved the task since.
+
+        Returns:
+            The saved record, if any
+        """
+        record = self.record(task.issue_number)
+        if not record:
+            return None
+        saved = record.state
+        task.review_cycles = saved.review_cycles
+        task.qa_cycles = saved.qa_cycles
+        task.pr_number = task.pr_number or saved.pr_number
+        task.pr_url = task.pr_url or saved.pr_url
+        task.branch_name = saved.branch_name or task.branch_name
+        logger.info(
+            f"Restored state for #{task.issue_number}: review cycles "
+            f"{saved.review_cycles}, QA cycles {saved.qa_cycles}, "
+            f"PR {f'#{saved.pr_number}' if saved.pr_number else 'none'}"
+            + (
+                f", checkpoint '{record.checkpoint}' in {saved.current_stage}"
+                if record.checkpoint else ""
+            )
+        )
+        return record
+
+    # ─── Internal ───────────────────────────────────────────────────────
+
+    def _upsert(self, values: dict):
+        """Insert or update a record's columns. Caller must hold the lock."""
+        now = _utcnow()
+        values = {**values, "updated_at": now}
+        columns = list(values)
+        self._db.execute(
+            f"INSERT INTO task_state ({', '.join(columns)}, created_at) "
+            f"VALUES ({', '.join('?' * len(columns))}, ?) "
+            f"ON CONFLICT(issue_number) DO UPDATE SET "
+            + ", ".join(f"{c} = excluded.{c}" for c in columns if c != "issue_number"),
+            [values[c] for c in columns] + [now],
+        )
+
+
+def _to_record(row: sqlite3.Row) -> TaskRecord:
+    return TaskRecord(
+        state=TaskState(**{c: row[c] for c in _STATE_COLUMNS}),
+        worktree_path=row["worktree_path"],
+        session_id=row["session_id"],
+        checkpoint=row["checkpoint"],
+        stage_attempts=row["stage_attempts"],
+        iterations=row["iterations"],
+        created_at=row["created_at"],
+        stage_started_at=row["stage_started_at"],
+        updated_at=row["updated_at"],
+    )
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat()
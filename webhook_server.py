@@ -0,0 +1,285 @@
+"""
+webhook_server.py — Optional embedded listener for GitHub webhooks.
+
+Accepts `issues`, `issue_comment` and `label` deliveries for the task repo,
+verifies their X-Hub-Signature-256 signature, and queues them so the poll
+loop wakes up immediately instead of waiting for the next interval.
+
+Recorded payloads can be replayed against a running listener for local
+testing:
+
+    python webhook_server.py replay payloads/*.json \\
+        --url http://localhost:8080/webhook --secret "$WEBHOOK_SECRET"
+
+Each file holds {"event": "<X-GitHub-Event>", "payload": {...}}, or a raw
+payload when --event is given.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import queue
+import sys
+import threading
+import urllib.request
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+ACCEPTED_EVENTS = {"issues", "issue_comment", "label"}
+
+# GitHub caps webhook payloads at 25 MB
+MAX_PAYLOAD_BYTES = 25 * 1024 * 1024
+
+
+@dataclass
+class WebhookEvent:
+    """A verified webhook delivery."""
+    event: str
+    action: str
+    delivery_id: str
+    payload: dict = field(repr=False)
+
+    @property
+    def issue(self) -> Optional[dict]:
+        """The issue the event refers to, if any (pull requests excluded)."""
+        issue = self.payload.get("issue")
+        if issue and "pull_request" not in issue:
+            return issue
+        return None
+
+    @property
+    def issue_number(self) -> Optional[int]:
+        issue = self.issue
+        return issue["number"] if issue else None
+
+    @property
+    def comment(self) -> Optional[dict]:
+        return self.payload.get("comment")
+
+
+def sign_payload(secret: str, body: bytes) -> str:
+    """Compute the X-Hub-Signature-256 header value for a body."""
+    digest = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+class WebhookListener:
+    """Embedded HTTP server that turns webhook deliveries into queued events."""
+
+    def __init__(
+        self,
+        secret: str,
+        task_repo: str,
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        path: str = "/webhook",
+        on_event: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Args:
+            secret: Webhook secret configured on GitHub (required)
+            task_repo: Only deliveries for this repo are accepted
+            host: Interface to bind
+            port: Port to listen on
+            path: URL path GitHub posts to
+            on_event: Called after an event is queued (e.g. to wake the poll loop)
+        """
+        self.secret = secret
+        self.task_repo = task_repo
+        self.host = host
+        self.port = port
+        self.path = path
+        self.on_event = on_event
+        self.events: queue.Queue[WebhookEvent] = queue.Queue()
+        self._recent_deliveries: deque[str] = deque(maxlen=500)
+        self._deliveries_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """Start serving in a background thread. Returns False if it couldn't."""
+        if not self.secret:
+            logger.error("Webhook listener needs a secret; not starting")
+            return False
+        try:
+            self._server = ThreadingHTTPServer(
+                (self.host, self.port), _make_handler(self),
+            )
+        except OSError as e:
+            logger.error(f"Failed to bind webhook listener on {self.host}:{self.port}: {e}")
+            return False
+
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="webhook-listener", daemon=True,
+        )
+        self._thread.start()
+        logger.info(f"Webhook listener on http://{self.host}:{self.port}{self.path}")
+        return True
+
+    def stop(self):
+        """Shut the server down."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def drain(self) -> list[WebhookEvent]:
+        """Take every queued event without blocking."""
+        drained = []
+        while True:
+            try:
+                drained.append(self.events.get_nowait())
+            except queue.Empty:
+                return drained
+
+    def handle(
+        self, event: str, body: bytes, signature: str, delivery_id: str = ""
+    ) -> tuple[int, str]:
+        """
+        Verify and queue one delivery. Used by the HTTP handler and by tests
+        replaying recorded payloads in-process.
+
+        Returns:
+            Tuple of (HTTP status, short message)
+        """
+        expected = sign_payload(self.secret, body)
+        if not signature or not hmac.compare_digest(expected, signature):
+            logger.warning(f"Rejected webhook delivery {delivery_id}: bad signature")
+            return 401, "invalid signature"
+
+        if event == "ping":
+            return 200, "pong"
+
+        if event not in ACCEPTED_EVENTS:
+            return 202, f"ignored event {event}"
+
+        try:
+            payload = json.loads(body.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return 400, "invalid JSON"
+
+        repo = (payload.get("repository") or {}).get("full_name", "")
+        if self.task_repo and repo.lower() != self.task_repo.lower():
+            return 202, f"ignored repo {repo}"
+
+        if delivery_id:
+            with self._deliveries_lock:
+                if delivery_id in self._recent_deliveries:
+                    return 200, "duplicate delivery"
+                self._recent_deliveries.append(delivery_id)
+
+        webhook_event = WebhookEvent(
+            event=event,
+            action=payload.get("action", ""),
+            delivery_id=delivery_id,
+            payload=payload,
+        )
+        self.events.put(webhook_event)
+        logger.info(
+            f"Webhook: {event}.{webhook_event.action}"
+            + (f" on #{webhook_event.issue_number}" if webhook_event.issue_number else "")
+        )
+
+        if self.on_event:
+            self.on_event()
+        return 202, "queued"
+
+
+def _make_handler(listener: WebhookListener) -> type:
+    """Build a request handler class bound to a listener."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path.split("?", 1)[0] != listener.path:
+                self._reply(404, "not found")
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                length = -1
+            if length < 0 or length > MAX_PAYLOAD_BYTES:
+                self._reply(413, "payload too large")
+                return
+
+            body = self.rfile.read(length)
+            status, message = listener.handle(
+                self.headers.get("X-GitHub-Event", ""),
+                body,
+                self.headers.get("X-Hub-Signature-256", ""),
+                self.headers.get("X-GitHub-Delivery", ""),
+            )
+            self._reply(status, message)
+
+        def do_GET(self):
+            # Lightweight health check
+            self._reply(200, "ok")
+
+        def log_message(self, format, *args):
+            logger.debug(f"Webhook HTTP: {format % args}")
+
+        def _reply(self, status: int, message: str):
+            data = message.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+# ─── Replay ─────────────────────────────────────────────────────────────
+
+def replay(paths: list[str], url: str, secret: str, event: Optional[str] = None) -> int:
+    """
+    POST recorded payloads to a listener, signed like GitHub would.
+
+    Returns:
+        Number of deliveries that were not accepted
+    """
+    failures = 0
+    for path in paths:
+        with open(path, "r") as f:
+            recorded = json.load(f)
+
+        if event:
+            event_name, payload = event, recorded
+        else:
+            event_name, payload = recorded.get("event", ""), recorded.get("payload", {})
+
+        body = json.dumps(payload).encode("utf-8")
+        request = urllib.request.Request(url, data=body, method="POST", headers={
+            "Content-Type": "application/json",
+            "X-GitHub-Event": event_name,
+            "X-GitHub-Delivery": str(uuid.uuid4()),
+            "X-Hub-Signature-256": sign_payload(secret, body),
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=10) as resp:
+                print(f"{path}: {resp.status} {resp.read().decode('utf-8')}")
+        except Exception as e:
+            print(f"{path}: {e}")
+            failures += 1
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded GitHub webhook payloads")
+    sub = parser.add_subparsers(dest="command", required=True)
+    replay_parser = sub.add_parser("replay")
+    replay_parser.add_argument("paths", nargs="+")
+    replay_parser.add_argument("--url", default="http://localhost:8080/webhook")
+    replay_parser.add_argument("--secret", required=True)
+    replay_parser.add_argument("--event", default=None)
+    args = parser.parse_args()
+
+    sys.exit(1 if replay(args.paths, args.url, args.secret, args.event) else 0)
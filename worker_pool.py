@@ -0,0 +1,116 @@
+"""
+worker_pool.py — Drive several tasks through their lifecycle concurrently.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Optional
+from task_runner import TaskRunner
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """
+    Runs up to ``max_workers`` tasks in parallel, one worker thread per issue.
+
+    Each worker builds its own TaskRunner (and therefore its own personas)
+    so no per-task state is shared between threads.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        runner_factory: Callable[[], TaskRunner],
+        on_complete: Optional[Callable[[int, bool], None]] = None,
+    ):
+        """
+        Args:
+            max_workers: Maximum number of tasks to run at once
+            runner_factory: Callable returning a fresh TaskRunner
+            on_complete: Called with (issue_number, completed) when a worker finishes
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.runner_factory = runner_factory
+        self.on_complete = on_complete
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="task-worker",
+        )
+        self._lock = threading.Lock()
+        self._in_flight: dict[int, Future] = {}
+
+    def free_slots(self) -> int:
+        """Number of workers currently idle."""
+        with self._lock:
+            return self.max_workers - len(self._in_flight)
+
+    def in_flight(self) -> set[int]:
+        """Issue numbers currently being worked on."""
+        with self._lock:
+            return set(self._in_flight)
+
+    def is_running(self, issue_number: int) -> bool:
+        """Check whether an issue is already being driven by a worker."""
+        with self._lock:
+            return issue_number in self._in_flight
+
+    def submit(self, issue: dict) -> bool:
+        """
+        Start driving an issue on a free worker.
+
+        Returns:
+            True if the issue was dispatched, False if it is already running
+            or every worker is busy.
+        """
+        issue_number = issue["number"]
+        with self._lock:
+            if issue_number in self._in_flight:
+                return False
+            if len(self._in_flight) >= self.max_workers:
+                return False
+            future = self._executor.submit(self._run, issue)
+            self._in_flight[issue_number] = future
+
+        future.add_done_callback(lambda f: self._finished(issue_number, f))
+        logger.info(
+            f"Dispatched #{issue_number} "
+            f"({self.max_workers - self.free_slots()}/{self.max_workers} workers busy)"
+        )
+        return True
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and optionally wait for in-flight tasks."""
+        pending = self.in_flight()
+        if pending and wait:
+            logger.info(
+                f"Waiting for {len(pending)} in-flight task(s) to finish: "
+                + ", ".join(f"#{n}" for n in sorted(pending))
+            )
+        self._executor.shutdown(wait=wait)
+
+    # ─── Internal ───────────────────────────────────────────────────────
+
+    def _run(self, issue: dict) -> bool:
+        """Worker body: run one task through its lifecycle."""
+        try:
+            runner = self.runner_factory()
+            return runner.run(issue)
+        except Exception:
+            logger.exception(f"Worker crashed on #{issue.get('number')}")
+            return False
+
+    def _finished(self, issue_number: int, future: Future):
+        """Release the worker slot and report the outcome."""
+        with self._lock:
+            self._in_flight.pop(issue_number, None)
+
+        completed = False
+        if not future.cancelled() and future.exception() is None:
+            completed = bool(future.result())
+
+        if self.on_complete:
+            try:
+                self.on_complete(issue_number, completed)
+            except Exception:
+                logger.exception(f"Completion callback failed for #{issue_number}")